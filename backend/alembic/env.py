@@ -0,0 +1,76 @@
+from logging.config import fileConfig
+
+from sqlalchemy import engine_from_config
+from sqlalchemy import inspect
+from sqlalchemy import pool
+
+from alembic import context
+
+from app.database import Base, DATABASE_URL, import_models
+from app.core.search import include_object
+
+import_models()
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# An explicitly passed URL (e.g. from scripts/check_schema.py) wins over the environment
+if not config.get_main_option("sqlalchemy.url") and DATABASE_URL:
+    config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting SQL to the script output."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        render_as_batch=url.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def adopt_unversioned_database(connection) -> None:
+    """Stamp 0001 on a database created by ``Base.metadata.create_all``.
+
+    Such a database already has the initial tables but no ``alembic_version``,
+    so 0001 would fail with "table already exists". Deploys run ``alembic
+    upgrade head`` unattended, so the one-time ``alembic stamp 0001`` happens here.
+    """
+    tables = set(inspect(connection).get_table_names())
+    if "users" in tables and "alembic_version" not in tables:
+        context.get_context().stamp(context.script, "0001")
+        connection.commit()
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode against a live connection."""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite cannot ALTER constraints in place; batch mode recreates the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        adopt_unversioned_database(connection)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
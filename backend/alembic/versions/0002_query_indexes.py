@@ -0,0 +1,54 @@
+"""composite indexes for list/filter queries, primary key on project_members
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # project_members had no key, so duplicate or NULL rows may exist; drop them first
+    row_id = "ctid" if op.get_bind().dialect.name == "postgresql" else "rowid"
+    op.execute("DELETE FROM project_members WHERE project_id IS NULL OR user_id IS NULL")
+    op.execute(
+        f"DELETE FROM project_members WHERE {row_id} NOT IN ("
+        f"SELECT MIN({row_id}) FROM project_members GROUP BY project_id, user_id)"
+    )
+    with op.batch_alter_table("project_members") as batch_op:
+        batch_op.alter_column("project_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column("user_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key("pk_project_members", ["project_id", "user_id"])
+    op.create_index("ix_project_members_user_id", "project_members", ["user_id"])
+
+    op.create_index("ix_tasks_project_id_id", "tasks", ["project_id", "id"])
+    op.create_index("ix_tasks_project_id_status_id", "tasks", ["project_id", "status", "id"])
+    op.create_index("ix_tasks_project_id_priority_id", "tasks", ["project_id", "priority", "id"])
+    op.create_index("ix_tasks_project_id_assignee_id_id", "tasks", ["project_id", "assignee_id", "id"])
+    op.create_index("ix_tasks_assignee_id", "tasks", ["assignee_id"])
+
+    op.create_index("ix_comments_task_id_id", "comments", ["task_id", "id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_comments_task_id_id", table_name="comments")
+
+    op.drop_index("ix_tasks_assignee_id", table_name="tasks")
+    op.drop_index("ix_tasks_project_id_assignee_id_id", table_name="tasks")
+    op.drop_index("ix_tasks_project_id_priority_id", table_name="tasks")
+    op.drop_index("ix_tasks_project_id_status_id", table_name="tasks")
+    op.drop_index("ix_tasks_project_id_id", table_name="tasks")
+
+    op.drop_index("ix_project_members_user_id", table_name="project_members")
+    with op.batch_alter_table("project_members") as batch_op:
+        batch_op.drop_constraint("pk_project_members", type_="primary")
+        batch_op.alter_column("project_id", existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column("user_id", existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,47 @@
+"""project_task_counts summary table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        "project_task_counts",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("dimension", sa.String(length=16), nullable=False),
+        sa.Column("value", sa.String(length=32), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id", "dimension", "value"),
+    )
+    # Backfill from the existing tasks; from here on the write paths maintain it
+    op.execute(
+        "INSERT INTO project_task_counts (project_id, dimension, value, count) "
+        "SELECT project_id, 'status', CAST(status AS VARCHAR), COUNT(*) FROM tasks "
+        "WHERE status IS NOT NULL GROUP BY project_id, status"
+    )
+    op.execute(
+        "INSERT INTO project_task_counts (project_id, dimension, value, count) "
+        "SELECT project_id, 'priority', CAST(priority AS VARCHAR), COUNT(*) FROM tasks "
+        "WHERE priority IS NOT NULL GROUP BY project_id, priority"
+    )
+    op.execute(
+        "INSERT INTO project_task_counts (project_id, dimension, value, count) "
+        "SELECT project_id, 'assignee', COALESCE(CAST(assignee_id AS VARCHAR), 'none'), COUNT(*) FROM tasks "
+        "GROUP BY project_id, assignee_id"
+    )
+
+def downgrade() -> None:
+    op.drop_table("project_task_counts")
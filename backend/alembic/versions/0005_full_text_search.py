@@ -0,0 +1,62 @@
+"""full-text search indexes on tasks and comments
+
+Postgres gets generated tsvector columns with GIN indexes. SQLite gets
+external-content FTS5 tables that triggers keep in sync.
+
+SQLite batch migrations that recreate ``tasks`` or ``comments`` drop these
+triggers. Such migrations must re-run ``sqlite_trigger_ddl`` afterwards.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.search import SEARCH_CONFIG, SQLITE_FTS, sqlite_trigger_ddl
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)")
+        op.execute(
+            "ALTER TABLE comments ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            f"to_tsvector('{SEARCH_CONFIG}', content)) STORED"
+        )
+        op.execute("CREATE INDEX ix_comments_search_vector ON comments USING gin (search_vector)")
+        return
+
+    for table, (fts, columns) in SQLITE_FTS.items():
+        # prefix='2 3' adds prefix indexes so short "ab*" queries stay index lookups
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, content='{table}', "
+            f"content_rowid='id', tokenize='porter unicode61', prefix='2 3')"
+        )
+        for statement in sqlite_trigger_ddl(table):
+            op.execute(statement)
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_comments_search_vector")
+        op.execute("ALTER TABLE comments DROP COLUMN search_vector")
+        op.execute("DROP INDEX ix_tasks_search_vector")
+        op.execute("ALTER TABLE tasks DROP COLUMN search_vector")
+        return
+
+    for table, (fts, _) in SQLITE_FTS.items():
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE {fts}")
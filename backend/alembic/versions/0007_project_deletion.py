@@ -0,0 +1,58 @@
+"""ON DELETE CASCADE below projects, projects.deleted_at for soft deletes
+
+SQLite cannot alter a foreign key in place: batch mode recreates ``tasks`` and
+``comments``, so their full-text triggers are recreated afterwards.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.search import SQLITE_FTS, sqlite_trigger_ddl
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table)
+CASCADES = [
+    ("tasks", "project_id", "projects"),
+    ("comments", "task_id", "tasks"),
+    ("project_members", "project_id", "projects"),
+]
+# Names the unnamed SQLite constraints so batch mode can find them
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+def _set_ondelete(ondelete):
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for table, column, referred in CASCADES:
+        if postgres:
+            name = f"{table}_{column}_fkey"
+            op.drop_constraint(name, table, type_="foreignkey")
+            op.create_foreign_key(name, table, referred, [column], ["id"], ondelete=ondelete)
+            continue
+        name = f"fk_{table}_{column}_{referred}"
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_="foreignkey")
+            batch_op.create_foreign_key(name, referred, [column], ["id"], ondelete=ondelete)
+    if not postgres:
+        for table in SQLITE_FTS:
+            for statement in sqlite_trigger_ddl(table):
+                op.execute(statement)
+
+def upgrade() -> None:
+    _set_ondelete("CASCADE")
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.add_column(sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.drop_column("deleted_at")
+    _set_ondelete(None)
@@ -0,0 +1,22 @@
+"""index projects by owner for membership-aware listing
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_index("ix_projects_owner_id_id", "projects", ["owner_id", "id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_projects_owner_id_id", table_name="projects")
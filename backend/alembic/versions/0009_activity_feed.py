@@ -0,0 +1,59 @@
+"""activities table for the project feed, tasks.comment_count and tasks.last_activity_at
+
+The feed starts empty: earlier history was never recorded. Counters are
+backfilled from the existing comments.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.search import sqlite_trigger_ddl
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        "activities",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_activities_project_id_id", "activities", ["project_id", "id"])
+
+    # Plain ADD COLUMN on both dialects: no table rebuild, so the SQLite FTS triggers stay put
+    op.add_column("tasks", sa.Column("comment_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("tasks", sa.Column("last_activity_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE tasks SET "
+        "comment_count = (SELECT count(*) FROM comments WHERE comments.task_id = tasks.id), "
+        "last_activity_at = COALESCE("
+        "(SELECT max(comments.created_at) FROM comments WHERE comments.task_id = tasks.id), tasks.created_at)"
+    )
+
+def downgrade() -> None:
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("last_activity_at")
+        batch_op.drop_column("comment_count")
+    if op.get_bind().dialect.name == "sqlite":
+        # Batch mode rebuilt tasks, dropping its triggers
+        for statement in sqlite_trigger_ddl("tasks"):
+            op.execute(statement)
+    op.drop_index("ix_activities_project_id_id", table_name="activities")
+    op.drop_table("activities")
@@ -0,0 +1,34 @@
+"""tasks.version and projects.version for conditional updates
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.search import sqlite_trigger_ddl
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # Plain ADD COLUMN with a constant default: existing rows start at version 1 without a rewrite
+    op.add_column("tasks", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+    op.add_column("projects", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.drop_column("version")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("version")
+    if op.get_bind().dialect.name == "sqlite":
+        # Batch mode rebuilt tasks, dropping its triggers
+        for statement in sqlite_trigger_ddl("tasks"):
+            op.execute(statement)
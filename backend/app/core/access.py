@@ -0,0 +1,80 @@
+"""Who may see a project: its owner and its members.
+
+``accessible_project_ids`` is the single definition, as one indexed UNION
+(``projects.owner_id`` and ``project_members.user_id``). Listing and search
+embed it as a subquery. Per-project checks go through ``require_access``,
+which reads a per-worker cache holding each user's set of project ids. A
+warm cache makes the check a set lookup with no query.
+
+An entry is refreshed when it is older than ACCESS_CACHE_TTL_SECONDS, or when
+a project id is missing from it. Newly created projects and new memberships
+are therefore visible at once, on every worker. Nothing revokes access today
+except deleting a project, and the routes' own queries already filter
+``deleted_at``. Only owner-only actions (editing or deleting the project,
+adding members) still compare ``owner_id``.
+"""
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.project import Project, project_members
+
+ACCESS_CACHE_SIZE = int(os.getenv("ACCESS_CACHE_SIZE", 10000))
+ACCESS_CACHE_TTL_SECONDS = int(os.getenv("ACCESS_CACHE_TTL_SECONDS", 30))
+
+def accessible_project_ids(user_id: int):
+    """Ids of live projects the user owns or has been added to, as a subquery."""
+    return select(Project.id).where(Project.owner_id == user_id, Project.deleted_at.is_(None)).union(
+        select(project_members.c.project_id)
+        .join(Project, Project.id == project_members.c.project_id)
+        .where(project_members.c.user_id == user_id, Project.deleted_at.is_(None))
+    )
+
+class AccessCache:
+    """Bounded LRU of ``user_id -> frozenset(project ids)``. Only touched from the event loop."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, user_id: int):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        project_ids, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return project_ids
+
+    def put(self, user_id: int, project_ids: frozenset):
+        if self.maxsize <= 0:
+            return
+        self._entries[user_id] = (project_ids, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def forget(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+access_cache = AccessCache(ACCESS_CACHE_SIZE, ACCESS_CACHE_TTL_SECONDS)
+
+async def accessible_projects(db, user_id: int, project_ids=()) -> frozenset:
+    """The user's project ids, reloaded first if any of ``project_ids`` is not among the cached ones."""
+    cached = access_cache.get(user_id)
+    if cached is not None and cached.issuperset(project_ids):
+        return cached
+    loaded = frozenset((await db.scalars(accessible_project_ids(user_id))).all())
+    access_cache.put(user_id, loaded)
+    return loaded
+
+async def require_access(db, user_id: int, project_id: int, action: str = "view tasks"):
+    """Raise 403 unless the user owns or is a member of ``project_id``."""
+    if project_id not in await accessible_projects(db, user_id, (project_id,)):
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action}")
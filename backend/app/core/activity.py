@@ -0,0 +1,29 @@
+"""The project activity feed: an append-only log written alongside each change.
+
+Writers call ``record`` (or ``record_many`` for bulk operations) inside the
+transaction that makes the change, so the feed never shows a change that
+rolled back. ``kind`` names what happened, mostly matching the SSE event
+types (``task.created``, ``task.updated``, ``task.status_changed``,
+``task.deleted``, ``comment.created``, ``project.updated``,
+``member.added``, ``project.imported``). ``data`` holds just enough to render
+the entry without joining back to rows that may since have changed or gone.
+
+Entries are never updated. They go when their project is purged.
+"""
+from sqlalchemy import insert
+
+from app.models.activity import Activity
+
+EXCERPT_LENGTH = 140
+
+def record(db, project_id: int, kind: str, user_id: int | None, task_id: int | None = None, **data):
+    """Add one entry; it is inserted with the rest of the unit of work at commit."""
+    db.add(Activity(project_id=project_id, task_id=task_id, user_id=user_id, kind=kind, data=data))
+
+async def record_many(db, entries: list):
+    """Insert ``{"project_id", "task_id", "user_id", "kind", "data"}`` dicts with one executemany."""
+    if entries:
+        await db.execute(insert(Activity.__table__), entries)
+
+def excerpt(text: str) -> str:
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH - 1] + "…"
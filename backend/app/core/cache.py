@@ -0,0 +1,161 @@
+"""Conditional GETs and an optional response cache for read endpoints.
+
+Every project has a ``data_version`` that each task/comment/project write bumps.
+Read routes derive a weak ETag from that version plus the request's query
+string, answer ``If-None-Match`` with 304, and otherwise serve or fill a shared
+cache keyed by the same ETag. Because the key changes with every write, writes
+never need to delete cache entries; stale ones simply age out.
+
+RESPONSE_CACHE selects the backend: "memory" (default), "off", or a
+``redis://`` URL (requires the optional ``redis`` package).
+
+Writes are conditional the other way round. Tasks and projects carry a
+``version`` that each update increments, and single-row writes answer with
+it as a strong ``ETag: "<version>"``. A client that sends it back in
+``If-Match`` gets 409 instead of overwriting someone else's change.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import update
+
+from app.core.metrics import Counter
+from app.core.responses import dump_json
+from app.models.project import Project
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1000))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+CACHE_CONTROL = "private, no-cache"
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests", "Cacheable reads by outcome (not_modified, hit, miss)", ["route", "outcome"]
+)
+
+class MemoryResponseCache:
+    """Per-process LRU of serialized response bodies."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        body, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    async def set(self, key: str, body: bytes):
+        self._entries[key] = (body, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+class RedisResponseCache:
+    """Shared cache for multi-worker deployments; any Redis-protocol server works."""
+
+    def __init__(self, url: str, ttl: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE is a redis:// URL but the 'redis' package is not installed")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str):
+        return await self.client.get(f"response:{key}")
+
+    async def set(self, key: str, body: bytes):
+        await self.client.set(f"response:{key}", body, ex=self.ttl)
+
+def _build_cache():
+    if RESPONSE_CACHE == "off":
+        return None
+    if RESPONSE_CACHE.startswith(("redis://", "rediss://")):
+        return RedisResponseCache(RESPONSE_CACHE, RESPONSE_CACHE_TTL_SECONDS)
+    return MemoryResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+response_cache = _build_cache()
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+async def cached_response(request: Request, etag: str, route: str):
+    """A 304 or a cached 200 for ``etag``, or None when the handler must build the body."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request, etag):
+        RESPONSE_CACHE_REQUESTS.inc(route=route, outcome="not_modified")
+        return Response(status_code=304, headers=headers)
+    if response_cache is not None:
+        body = await response_cache.get(etag)
+        if body is not None:
+            RESPONSE_CACHE_REQUESTS.inc(route=route, outcome="hit")
+            return Response(content=body, media_type="application/json", headers=headers)
+    RESPONSE_CACHE_REQUESTS.inc(route=route, outcome="miss")
+    return None
+
+async def store_response(etag: str, schema, data) -> Response:
+    """Serialize ``data`` as ``schema`` once, cache the bytes and return them with validators."""
+    body = dump_json(schema, data)
+    if response_cache is not None:
+        await response_cache.set(etag, body)
+    return Response(
+        content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+def if_match_versions(request: Request):
+    """The versions listed in ``If-Match``, or None when it is absent or ``*``.
+
+    Weak tags never match, as RFC 9110 requires; a bare number is accepted.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    candidates = (candidate.strip().strip('"') for candidate in header.split(",") if "W/" not in candidate)
+    return [int(candidate) for candidate in candidates if candidate.isdigit()]
+
+def check_if_match(request: Request, version: int, what: str):
+    """Raise 409 unless ``If-Match`` is absent, ``*``, or names ``version``."""
+    versions = if_match_versions(request)
+    if versions is not None and version not in versions:
+        raise_conflict(version, what)
+
+def raise_conflict(version: int | None, what: str):
+    headers = {"ETag": version_etag(version)} if version is not None else None
+    raise HTTPException(
+        status_code=409, detail=f"{what} was changed by someone else; reload it and try again", headers=headers
+    )
+
+async def bump_project_versions(db, project_ids):
+    """Invalidate cached reads for these projects; call in the same transaction as the write."""
+    project_ids = [project_id for project_id in set(project_ids) if project_id is not None]
+    if not project_ids:
+        return
+    await db.execute(
+        update(Project)
+        .where(Project.id.in_(project_ids))
+        .values(data_version=Project.data_version + 1),
+        execution_options={"synchronize_session": False},
+    )
@@ -0,0 +1,180 @@
+"""Project change events pushed to open boards over Server-Sent Events.
+
+Write routes call ``publish`` after they commit, and
+``GET /api/projects/{id}/events`` streams the events for one project. Each
+worker fans events out to its own subscribers in-process. EVENT_BROKER picks
+how publishes reach those workers:
+
+- ``local`` (default) delivers directly. This is enough for a single worker.
+- ``postgres`` sends each event through NOTIFY on the app database, and every
+  worker LISTENs. Subscribers on any worker then see writes made on any other.
+
+Subscribers that fall behind, or that miss events while the broker
+reconnects, are sent a ``resync`` event and should refetch.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import make_url
+
+from app.core.metrics import Counter, Gauge
+
+EVENT_BROKER = os.getenv("EVENT_BROKER", "local")
+EVENT_CHANNEL = "board_events"
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 256))
+EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+# NOTIFY payloads are capped at 8000 bytes; larger events go out without ``data``
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PUBLISHED = Counter("board_events_published", "Change events published by type", ["type"])
+EVENTS_DROPPED = Counter("board_events_dropped", "Subscriber queues that overflowed and were told to resync")
+
+class EventHub:
+    """Per-process fan-out from project id to subscriber queues."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+        self._subscribers[project_id].add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(project_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[project_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def deliver(self, event: dict):
+        for queue in list(self._subscribers.get(event["project_id"], ())):
+            self._put(queue, event)
+
+    def resync_all(self):
+        for project_id, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._put(queue, {"type": "resync", "project_id": project_id})
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow client: drop its backlog and have it refetch instead
+            EVENTS_DROPPED.inc()
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync", "project_id": event["project_id"]})
+
+hub = EventHub()
+
+Gauge(
+    "board_event_subscribers", "Open event streams in this worker",
+    callback=lambda: {(): hub.subscriber_count()},
+)
+
+class LocalBroker:
+    """Single-process stand-in: publishing is delivering."""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, event: dict):
+        hub.deliver(event)
+
+class PostgresBroker:
+    """Relays events between workers with LISTEN/NOTIFY on one dedicated asyncpg connection."""
+
+    def __init__(self, database_url: str):
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self):
+        if self._conn is None or self._conn.is_closed():
+            import asyncpg
+            reconnecting = self._conn is not None
+            self._conn = await asyncpg.connect(self.dsn)
+            self._conn.add_termination_listener(self._on_terminate)
+            await self._conn.add_listener(EVENT_CHANNEL, self._on_notify)
+            if reconnecting:
+                hub.resync_all()
+        return self._conn
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            hub.deliver(json.loads(payload))
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed %s payload", channel)
+
+    def _on_terminate(self, connection):
+        logger.warning("Event broker connection closed; reconnecting on next use")
+
+    async def start(self):
+        async with self._lock:
+            await self._connection()
+
+    async def stop(self):
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def publish(self, event: dict):
+        payload = json.dumps(event, default=str)
+        if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            payload = json.dumps({key: value for key, value in event.items() if key != "data"}, default=str)
+        async with self._lock:
+            conn = await self._connection()
+            await conn.execute("SELECT pg_notify($1, $2)", EVENT_CHANNEL, payload)
+
+def _build_broker():
+    if EVENT_BROKER == "postgres":
+        from app.database import DATABASE_URL
+        return PostgresBroker(DATABASE_URL)
+    return LocalBroker()
+
+broker = _build_broker()
+
+async def publish(project_id: int, type: str, **fields):
+    """Announce a committed change; failures are logged, never raised into the request."""
+    event = {"type": type, "project_id": project_id, **fields}
+    EVENTS_PUBLISHED.inc(type=type)
+    try:
+        await broker.publish(event)
+    except Exception:
+        logger.exception("Failed to publish %s event for project %s", type, project_id)
+
+async def _event_stream(project_id: int):
+    queue = hub.subscribe(project_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    finally:
+        hub.unsubscribe(project_id, queue)
+
+def event_stream_response(project_id: int) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(project_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
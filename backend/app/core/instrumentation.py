@@ -0,0 +1,153 @@
+"""Per-route request metrics and opt-in request profiling.
+
+``RequestMetricsMiddleware`` records latency, status, SQL statement count and
+SQL time for every HTTP request, labelled by route template, and exposes them
+at ``/api/metrics``.
+
+Request profiling is off unless PROFILING_ENABLED=true. When it is on, an
+admin (see ADMIN_EMAILS) sends ``X-Profile: 1``. The request then runs under
+pyinstrument if it is installed, or cProfile otherwise. The response carries
+an ``X-Profile-Id`` header, and the report can be fetched from
+``/api/metrics/profiles/{id}``. Only one request per worker is profiled at a
+time. Work that runs in the threadpool, such as sync-mode database calls,
+appears only as time spent waiting on it. cProfile traces the whole event loop
+thread, so requests running concurrently show up in its report as well.
+pyinstrument's async mode attributes time to the profiled request only.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.query_budget import current_queries
+from app.core.tokens import TokenError, authenticate_token
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", 20))
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route", ["method", "route"])
+REQUESTS = Counter("http_requests", "Requests by route and status code", ["method", "route", "status"])
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements issued per request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 50, 100),
+)
+REQUEST_SQL_SECONDS = Histogram("http_request_sql_seconds", "Time spent in SQL per request", ["method", "route"])
+IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being handled")
+
+class _Profile:
+    """One profiling session around a single request."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            self._profiler = cProfile.Profile()
+            self._sampling = False
+        else:
+            self._profiler = Profiler(async_mode="enabled")
+            self._sampling = True
+
+    def start(self):
+        if self._sampling:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        if self._sampling:
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+class ProfileStore:
+    """The most recent reports, per worker process."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.active = False
+        self._reports = OrderedDict()
+
+    def put(self, profile_id: str, report: str):
+        self._reports[profile_id] = report
+        while len(self._reports) > self.maxsize:
+            self._reports.popitem(last=False)
+
+    def get(self, profile_id: str):
+        return self._reports.get(profile_id)
+
+profiles = ProfileStore(PROFILE_HISTORY)
+
+def _header(scope, name: bytes):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _profile_requested(scope) -> bool:
+    if not PROFILING_ENABLED or profiles.active or not _header(scope, b"x-profile"):
+        return False
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return authenticate_token(token).is_admin
+    except TokenError:
+        return False
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and SQL usage.
+
+    Add it before ``QueryCountMiddleware`` so it runs inside that middleware's
+    per-request statement tally.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = profile_id = None
+        if _profile_requested(scope):
+            profiles.active = True
+            profile, profile_id = _Profile(), uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile_id:
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            if profile:
+                profile.start()
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_PROGRESS.dec()
+            if profile:
+                profiles.put(profile_id, profile.stop())
+                profiles.active = False
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            REQUEST_SECONDS.observe(elapsed, **labels)
+            REQUESTS.inc(status=str(status), **labels)
+            tally = current_queries()
+            if tally is not None:
+                REQUEST_SQL_STATEMENTS.observe(tally.count, **labels)
+                REQUEST_SQL_SECONDS.observe(tally.seconds, **labels)
@@ -0,0 +1,234 @@
+"""Background jobs: a durable queue in the ``jobs`` table, drained inside the API process.
+
+A route calls ``enqueue`` in its own transaction. The job therefore exists
+exactly when the write that asked for it commits. Each worker process runs
+JOB_WORKERS asyncio tasks. They claim due jobs and run the registered handler
+on the event loop with a session of their own. Postgres claims rows with
+``FOR UPDATE SKIP LOCKED``, so every uvicorn worker can share the table.
+SQLite serializes writers and needs nothing extra. No broker is involved.
+
+Delivery is at least once:
+
+- a failing job is retried with exponential backoff, up to ``max_attempts``;
+- a job whose worker died is reclaimed once its JOB_LEASE_SECONDS lease runs out.
+
+Handlers must therefore be idempotent. A handler may commit on its own; the
+job is marked done in a later transaction.
+
+    @job_handler("project.delete")
+    async def purge_project(db, payload): ...
+
+    await enqueue(db, "project.delete", {"project_id": 7}, idempotency_key="project.delete:7")
+    await db.commit()
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.metrics import Counter, Gauge, Histogram
+from app.database import open_session, upsert
+from app.models.job import Job, JobStatus
+
+# Worker tasks per process; 0 leaves the queue to other processes
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Idle workers re-check this often; commits that enqueue in this process wake them at once
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 5))
+# Finished jobs are kept this long (failed ones are kept for inspection)
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", 72))
+JOB_MAINTENANCE_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENQUEUED = Counter("jobs_enqueued", "Jobs added to the queue (idempotent repeats excluded)", ["kind"])
+JOB_RUNS = Counter("job_runs", "Job attempts by outcome (done, retry, failed)", ["kind", "outcome"])
+JOB_DURATION = Histogram("job_duration_seconds", "Time spent running one job attempt", ["kind"])
+JOB_WAIT = Histogram(
+    "job_wait_seconds", "Time from enqueue to first attempt", ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOBS_DEPTH = Gauge("jobs_depth", "Queued and running jobs, sampled every 30s", ["status"])
+
+_handlers = {}
+
+def job_handler(kind: str):
+    """Register ``async def handler(db, payload)`` for jobs of ``kind``."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+async def enqueue(db, kind: str, payload: dict | None = None, *, idempotency_key: str | None = None,
+                  delay: float = 0, max_attempts: int = 5) -> int:
+    """Add a job in ``db``'s transaction and return its id.
+
+    With ``idempotency_key``, a job already enqueued under that key is returned
+    instead of a new one being added.
+    """
+    now = datetime.utcnow()
+    stmt = upsert(Job.__table__).values(
+        kind=kind, payload=payload or {}, status=JobStatus.queued, attempts=0, max_attempts=max_attempts,
+        run_at=now + timedelta(seconds=delay), idempotency_key=idempotency_key, created_at=now,
+    )
+    if idempotency_key is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["idempotency_key"])
+    job_id = await db.scalar(stmt.returning(Job.id))
+    if job_id is None:
+        job_id = await db.scalar(select(Job.id).where(Job.idempotency_key == idempotency_key))
+    else:
+        JOBS_ENQUEUED.inc(kind=kind)
+        db.sync_session.info["jobs_enqueued"] = True
+    return job_id
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("jobs_enqueued", False):
+        runner.wake()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("jobs_enqueued", None)
+
+class JobRunner:
+    """The worker tasks of one process, plus a maintenance task for metrics and retention."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+
+    async def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        # Interrupted jobs stay "running" and are reclaimed once their lease expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        """Safe from any thread; threadpool sessions commit off the event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+            if job is not None:
+                await self._run(job)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        due = (
+            select(Job.id)
+            .where(Job.status.in_([JobStatus.queued, JobStatus.running]), Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        db = open_session()
+        try:
+            job = (await db.execute(
+                update(Job)
+                .where(Job.id == due)
+                .values(
+                    status=JobStatus.running, attempts=Job.attempts + 1,
+                    run_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                )
+                .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.created_at),
+                execution_options={"synchronize_session": False},
+            )).first()
+            await db.commit()
+            return job
+        finally:
+            await db.close()
+
+    async def _run(self, job):
+        if job.attempts == 1:
+            JOB_WAIT.observe((datetime.utcnow() - job.created_at).total_seconds(), kind=job.kind)
+        handler = _handlers.get(job.kind)
+        start = time.perf_counter()
+        db = open_session()
+        try:
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind {job.kind!r}")
+                if job.attempts > job.max_attempts:
+                    # Reclaimed after its worker died on the last allowed attempt
+                    raise RuntimeError("Lease expired on the final attempt")
+                await handler(db, job.payload)
+                values = {"status": JobStatus.done, "finished_at": datetime.utcnow(), "last_error": None}
+                outcome = "done"
+            except Exception as e:
+                await db.rollback()
+                error = f"{type(e).__name__}: {e}"[:2000]
+                if handler is not None and job.attempts < job.max_attempts:
+                    backoff = JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+                    values = {"status": JobStatus.queued, "run_at": datetime.utcnow() + timedelta(seconds=backoff),
+                              "last_error": error}
+                    outcome = "retry"
+                    logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job.id, job.kind, backoff, error)
+                else:
+                    values = {"status": JobStatus.failed, "finished_at": datetime.utcnow(), "last_error": error}
+                    outcome = "failed"
+                    logger.exception("Job %s (%s) failed permanently", job.id, job.kind)
+            await db.execute(
+                update(Job).where(Job.id == job.id).values(**values),
+                execution_options={"synchronize_session": False},
+            )
+            await db.commit()
+        except Exception:
+            # Could not record the outcome; the lease expiry retries the job
+            logger.exception("Could not record the outcome of job %s", job.id)
+            return
+        finally:
+            await db.close()
+            JOB_DURATION.observe(time.perf_counter() - start, kind=job.kind)
+        JOB_RUNS.inc(kind=job.kind, outcome=outcome)
+
+    async def _maintain(self):
+        while True:
+            db = open_session()
+            try:
+                rows = await db.execute(
+                    select(Job.status, func.count(Job.id))
+                    .where(Job.status.in_([JobStatus.queued, JobStatus.running]))
+                    .group_by(Job.status)
+                )
+                depth = dict(rows.all())
+                for status in (JobStatus.queued, JobStatus.running):
+                    JOBS_DEPTH.set(depth.get(status, 0), status=status.value)
+                cutoff = datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+                await db.execute(delete(Job).where(Job.status == JobStatus.done, Job.finished_at < cutoff))
+                await db.commit()
+            except Exception:
+                logger.exception("Job queue maintenance failed")
+            finally:
+                await db.close()
+            await asyncio.sleep(JOB_MAINTENANCE_SECONDS)
+
+runner = JobRunner(JOB_WORKERS)
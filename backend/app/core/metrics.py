@@ -0,0 +1,121 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Metrics are per worker process; scrape each worker or aggregate downstream.
+Updates come from threadpool threads as well as the event loop (SQL timing,
+pool checkouts), so every write and every read of the values holds ``_lock``.
+"""
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_lock = threading.Lock()
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def _snapshot(self):
+        """The values as sorted ``(key, value)`` pairs, copied under the lock."""
+        with _lock:
+            items = list(self._values.items())
+        return sorted(items)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {value}")
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return [("_total", key, None, value) for key, value in self._snapshot()]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        items = sorted(self.callback().items()) if self.callback else self._snapshot()
+        return [("", key, None, value) for key, value in items]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _snapshot(self):
+        # The bucket lists are updated in place, so they are copied too: counts and sum stay consistent
+        with _lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        return sorted(items)
+
+    def samples(self):
+        out = []
+        for key, (counts, total) in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(("_bucket", key, [("le", le)], cumulative))
+            out.append(("_sum", key, None, round(total, 6)))
+            out.append(("_count", key, None, cumulative))
+        return out
+
+def render_latest() -> str:
+    with _lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
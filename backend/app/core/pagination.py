@@ -0,0 +1,95 @@
+import base64
+import json
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.database import open_session
+from app.core.responses import adapter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STREAM_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode(cursor: str, key: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))[key])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_cursor(last_id: int) -> str:
+    return _encode({"id": last_id})
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    return _decode(cursor, "id")
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for ranked results, which have no stable key to seek on."""
+    return _encode({"offset": offset})
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    offset = _decode(cursor, "offset")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+async def paginate(db, stmt, model, cursor: Optional[str], limit: int, descending: bool = False):
+    """Keyset page over ``model.id``, which follows ``created_at`` insertion order.
+
+    ``stmt`` selects plain columns (see ``select_fields``), including ``id``.
+    ``descending`` pages newest first.
+    """
+    after_id = decode_cursor(cursor)
+    if after_id is not None:
+        stmt = stmt.where(model.id < after_id if descending else model.id > after_id)
+    order = model.id.desc() if descending else model.id
+    rows = (await db.execute(stmt.order_by(order).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
+
+def stream_ndjson(stmt, model, schema, replica: int | None = None):
+    """Stream every row of ``stmt`` as NDJSON, fetching from the DB in batches.
+
+    The generator runs after the request handler has returned, so it opens its
+    own session instead of using the request-scoped one, on the primary or on
+    read replica ``replica``. Lines are sent one batch per write rather than
+    one row per write.
+    """
+    stmt = stmt.order_by(model.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    row_adapter = adapter(schema)
+
+    async def generate():
+        db = open_session(replica)
+        try:
+            lines = []
+            async for row in await db.stream(stmt):
+                lines.append(row_adapter.dump_json(row_adapter.validate_python(row, from_attributes=True)))
+                if len(lines) >= STREAM_BATCH_SIZE:
+                    yield b"\n".join(lines) + b"\n"
+                    lines = []
+            if lines:
+                yield b"\n".join(lines) + b"\n"
+        finally:
+            await db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
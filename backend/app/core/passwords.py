@@ -0,0 +1,34 @@
+"""bcrypt hashing, kept free of FastAPI and database imports.
+
+These functions run in the spawned hashing processes (see
+``app.core.security``). Each worker imports this module and passlib, nothing
+more, so it comes up in milliseconds instead of loading the web stack.
+passlib itself is imported on first use.
+"""
+import os
+
+# Raising BCRYPT_ROUNDS rehashes existing passwords transparently on their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+_context = None
+
+def _get_context():
+    global _context
+    if _context is None:
+        from passlib.context import CryptContext
+        _context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _context
+
+def hash_password(password:str)->str:
+    return _get_context().hash(password)
+
+def verify_password(plainPassword:str, hashedPassword:str)->bool:
+    return _get_context().verify(plainPassword, hashedPassword)
+
+def verify_and_update_password(plainPassword:str, hashedPassword:str):
+    """(valid, new_hash); new_hash is set when the stored hash uses outdated settings."""
+    return _get_context().verify_and_update(plainPassword, hashedPassword)
+
+def warm_up():
+    """Load passlib and pick the bcrypt backend now rather than on the first login."""
+    _get_context().handler().get_backend()
@@ -0,0 +1,106 @@
+"""Per-request SQL statement counting/timing and per-route query budgets.
+
+Every statement executed on the app's engines is counted and timed against the
+current request, and the count is returned in the ``X-Query-Count`` header. Routes
+declare how many statements they may issue with
+``dependencies=[Depends(query_budget(n))]``. Going over the budget logs a
+warning and bumps a metric; with QUERY_BUDGET_STRICT=true it fails the request
+instead, which is how test and benchmark runs catch N+1 regressions.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event
+
+from app.core.metrics import Counter, Histogram
+
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_EXCEEDED = Counter(
+    "query_budget_exceeded", "Requests that issued more SQL statements than their route allows", ["route"]
+)
+SQL_STATEMENT_SECONDS = Histogram("db_statement_duration_seconds", "Time spent executing each SQL statement")
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+class RequestQueries:
+    """Mutable per-request tally; shared by reference with threadpool and greenlet copies of the context."""
+    __slots__ = ("count", "seconds", "budget", "route", "reported")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.budget = None
+        self.route = None
+        self.reported = False
+
+_current = ContextVar("request_queries", default=None)
+
+def current_queries():
+    return _current.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+    tally = _current.get()
+    if tally is None:
+        return
+    tally.count += 1
+    if tally.budget is not None and tally.count > tally.budget and not tally.reported:
+        tally.reported = True
+        QUERY_BUDGET_EXCEEDED.inc(route=tally.route or "")
+        message = f"{tally.route} issued {tally.count} SQL statements, budget is {tally.budget}"
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    SQL_STATEMENT_SECONDS.observe(elapsed)
+    tally = _current.get()
+    if tally is not None:
+        tally.seconds += elapsed
+
+def instrument_engine(engine):
+    """Count and time statements on ``engine`` (pass ``async_engine.sync_engine`` for asyncio engines)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def query_budget(max_statements: int):
+    """Route dependency declaring the most SQL statements the route may issue."""
+    async def dependency(request: Request):
+        tally = _current.get()
+        if tally is not None:
+            tally.budget = max_statements
+            route = request.scope.get("route")
+            tally.route = f"{request.method} {route.path if route else request.url.path}"
+    return dependency
+
+class QueryCountMiddleware:
+    """ASGI middleware that opens a tally for each HTTP request and reports it in ``X-Query-Count``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        tally = RequestQueries()
+        token = _current.set(tally)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(tally.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _current.reset(token)
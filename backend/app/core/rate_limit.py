@@ -0,0 +1,248 @@
+"""Admission control: per-caller token buckets and a global in-flight limit.
+
+``RateLimitMiddleware`` runs before routing and decides whether a request gets
+in at all. Two checks apply, in this order:
+
+1. Rate limit. Every caller has a token bucket that refills at
+   RATE_LIMIT_PER_SECOND, up to RATE_LIMIT_BURST tokens. Callers are keyed by
+   the ``user_id`` in their bearer token, or by client IP when there is no
+   valid token. ``/api/auth/*`` is always keyed by IP, with its own slower
+   bucket (AUTH_RATE_LIMIT_PER_MINUTE), because those routes run bcrypt. A
+   request spends the cost of its route, as listed in ROUTE_COSTS (default
+   1). An empty bucket answers 429 with ``Retry-After``.
+2. Concurrency. At most MAX_CONCURRENT_REQUESTS requests per worker run at
+   once. The default is the DB pool's size plus overflow, so requests queue
+   here rather than on a pool checkout. Up to MAX_QUEUED_REQUESTS wait for a
+   slot, for at most REQUEST_QUEUE_TIMEOUT_SECONDS each. Anything beyond that
+   is shed with 503 and ``Retry-After``.
+
+Health checks, metrics and event streams skip both checks. Streams are
+long-lived and would otherwise pin a slot each.
+
+RATE_LIMIT selects the bucket store:
+
+- "memory" (default) keeps buckets per worker, so N workers allow N times the rate;
+- "off" disables rate limiting;
+- a ``redis://`` URL shares buckets across workers (requires the optional ``redis`` package).
+
+If Redis is unreachable, requests are let through rather than failed.
+Behind a proxy, run uvicorn with ``--proxy-headers --forwarded-allow-ips``.
+Otherwise every client shares the proxy's IP.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from app.core.metrics import Counter, Gauge
+from app.core.tokens import TokenError, authenticate_token, bearer_token
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+RATE_LIMIT = os.getenv("RATE_LIMIT", "memory")
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 10))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 50))
+AUTH_RATE_LIMIT_PER_MINUTE = float(os.getenv("AUTH_RATE_LIMIT_PER_MINUTE", 20))
+AUTH_RATE_LIMIT_BURST = float(os.getenv("AUTH_RATE_LIMIT_BURST", 10))
+# Buckets kept per worker by the memory backend; the least recently used are dropped (refilled)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# In-flight requests per worker, 0 disables the limit
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", 100))
+REQUEST_QUEUE_TIMEOUT_SECONDS = float(os.getenv("REQUEST_QUEUE_TIMEOUT_SECONDS", 5))
+REQUEST_SHED_RETRY_AFTER = int(os.getenv("REQUEST_SHED_RETRY_AFTER", 1))
+
+# Tokens spent per request, by route name; anything unlisted costs 1.
+# Override or extend with ROUTE_COSTS="import_project=50,search=3".
+ROUTE_COSTS = {
+    "import_project": 20,
+    "export_project": 10,
+    "batch_tasks": 5,
+    "search": 2,
+}
+for _item in filter(None, os.getenv("ROUTE_COSTS", "").split(",")):
+    _name, _, _cost = _item.partition("=")
+    ROUTE_COSTS[_name.strip()] = float(_cost)
+
+# Not limited at all: probes, scrapes and long-lived streams
+EXEMPT_ROUTES = {"health_check", "readiness_check", "metrics", "project_events"}
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_REJECTED = Counter(
+    "http_requests_rejected", "Requests turned away before routing (rate_limited, queue_full, queue_timeout)",
+    ["reason"],
+)
+RATE_LIMIT_ERRORS = Counter("rate_limit_backend_errors", "Rate limit checks that failed open")
+REQUESTS_QUEUED = Gauge("http_requests_queued", "Requests waiting for a concurrency slot")
+
+class Bucket:
+    """Refill rate and capacity of one kind of token bucket."""
+
+    def __init__(self, name: str, per_second: float, burst: float):
+        self.name = name
+        self.per_second = per_second
+        self.burst = burst
+
+USER_BUCKET = Bucket("user", RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+AUTH_BUCKET = Bucket("auth", AUTH_RATE_LIMIT_PER_MINUTE / 60, AUTH_RATE_LIMIT_BURST)
+
+class MemoryRateLimiter:
+    """Token buckets in a per-process LRU. Only touched from the event loop, so it needs no locking."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, bucket: Bucket, key: str, cost: float) -> float:
+        """Spend ``cost`` tokens; return 0 if allowed, else the seconds until it would be."""
+        now = time.monotonic()
+        key = f"{bucket.name}:{key}"
+        tokens, updated = self._buckets.get(key, (bucket.burst, now))
+        tokens = min(bucket.burst, tokens + (now - updated) * bucket.per_second)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / bucket.per_second
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+# KEYS[1] bucket; ARGV rate per second, burst, cost. Returns the wait in milliseconds.
+_TAKE_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait
+"""
+
+class RedisRateLimiter:
+    """Buckets shared by every worker; one atomic script call per request."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT is a redis:// URL but the 'redis' package is not installed")
+        self.client = redis.from_url(url)
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, bucket: Bucket, key: str, cost: float) -> float:
+        wait_ms = await self._take(keys=[f"ratelimit:{bucket.name}:{key}"], args=[bucket.per_second, bucket.burst, cost])
+        return int(wait_ms) / 1000
+
+def _build_limiter():
+    if RATE_LIMIT == "off":
+        return None
+    if RATE_LIMIT.startswith(("redis://", "rediss://")):
+        return RedisRateLimiter(RATE_LIMIT)
+    return MemoryRateLimiter(RATE_LIMIT_MAX_KEYS)
+
+limiter = _build_limiter()
+
+def _route_name(scope):
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            # As the router would; rejected requests are then labelled with their route in metrics
+            scope["route"] = route
+            return getattr(route, "name", None)
+    return None
+
+def _caller(scope) -> tuple:
+    """The bucket and key a request is charged to."""
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    if scope["path"].startswith("/api/auth/"):
+        return AUTH_BUCKET, ip
+    token = bearer_token(scope)
+    if token:
+        try:
+            return USER_BUCKET, str(authenticate_token(token).user_id)
+        except TokenError:
+            pass
+    # Unauthenticated requests are mostly 401s; they still count against the IP
+    return USER_BUCKET, f"ip:{ip}"
+
+def _rejection(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail}, status_code=status_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the rate limit, then the concurrency limit.
+
+    Add it before ``RequestMetricsMiddleware`` so rejected requests are still
+    counted per route.
+    """
+
+    def __init__(self, app, max_concurrent: int = MAX_CONCURRENT_REQUESTS):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        self._queued = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+        name = _route_name(scope)
+        if name in EXEMPT_ROUTES:
+            return await self.app(scope, receive, send)
+
+        if limiter is not None:
+            bucket, key = _caller(scope)
+            try:
+                wait = await limiter.take(bucket, key, ROUTE_COSTS.get(name, 1))
+            except Exception:
+                logger.warning("Rate limit check failed; letting the request through", exc_info=True)
+                RATE_LIMIT_ERRORS.inc()
+                wait = 0
+            if wait > 0:
+                REQUESTS_REJECTED.inc(reason="rate_limited")
+                return await _rejection(429, "Too many requests", wait)(scope, receive, send)
+
+        if self._slots is None:
+            return await self.app(scope, receive, send)
+        if self._slots.locked():
+            if self._queued >= MAX_QUEUED_REQUESTS:
+                REQUESTS_REJECTED.inc(reason="queue_full")
+                return await _rejection(503, "Server is busy, try again shortly", REQUEST_SHED_RETRY_AFTER)(
+                    scope, receive, send
+                )
+            self._queued += 1
+            REQUESTS_QUEUED.inc()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), REQUEST_QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                REQUESTS_REJECTED.inc(reason="queue_timeout")
+                return await _rejection(503, "Server is busy, try again shortly", REQUEST_SHED_RETRY_AFTER)(
+                    scope, receive, send
+                )
+            finally:
+                self._queued -= 1
+                REQUESTS_QUEUED.dec()
+        else:
+            await self._slots.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
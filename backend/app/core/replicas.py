@@ -0,0 +1,252 @@
+"""Read replicas for the read-only routes.
+
+With DATABASE_REPLICA_URLS set, the busiest dashboard reads (``list_projects``,
+``get_project``, ``list_tasks``, ``get_comments``) take their session from
+``get_read_db`` instead of ``get_db``. It picks the next healthy replica in
+round-robin order. Their ``stream=true`` responses read from the same
+replica as the rest of the request. Everything else, including every write,
+stays on the primary.
+
+Health: a background task checks each replica every
+REPLICA_HEALTH_INTERVAL_SECONDS. On Postgres it also measures replay lag, and
+a replica more than REPLICA_MAX_LAG_SECONDS behind is skipped until it catches
+up. A replica whose connection fails during a request is also skipped until
+the next check passes. With no healthy replica, reads go to the primary.
+
+Read-your-writes: replication is asynchronous, so a user who just saved a task
+could reload the board from a replica that has not seen it yet.
+``ReadYourWritesMiddleware`` notes every authenticated POST/PUT/PATCH/DELETE.
+That user's reads then stay on the primary for REPLICA_STICKY_SECONDS after
+the write finishes. REPLICA_STICKY_STORE holds these marks: "memory" (the
+default) keeps them per worker, and a ``redis://`` URL shares them between
+workers. With several workers and the memory store, a read that lands on a
+different worker than the write is not protected.
+
+To try it locally, point the replicas at copies of a SQLite primary and keep
+them refreshed with ``python -m scripts.sync_replicas --interval 2``.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Depends
+from sqlalchemy import exc, text
+
+from app.core.metrics import Counter, Gauge
+from app.core.security import get_current_user
+from app.core.tokens import Principal, TokenError, authenticate_token, bearer_token
+from app.database import DATABASE_REPLICA_URLS, open_session
+
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", 5))
+# Postgres only; 0 disables the lag check
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_STORE = os.getenv("REPLICA_STICKY_STORE", "memory")
+# Users tracked per worker by the memory store; the least recently written are dropped
+REPLICA_STICKY_MAX_USERS = int(os.getenv("REPLICA_STICKY_MAX_USERS", 100000))
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# 0 when the replica has replayed everything it received, else the age of the last replayed transaction
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+logger = logging.getLogger(__name__)
+
+READ_SESSIONS = Counter(
+    "db_read_sessions", "Sessions opened by read-only routes: on a replica, on the primary after a recent write (sticky), or on the primary",
+    ["target"],
+)
+
+class Replica:
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.is_postgres = url.startswith("postgres")
+        # Assumed healthy until a check or a request says otherwise
+        self.healthy = True
+        self.lag = 0.0
+
+class ReplicaSet:
+    """Round-robin over the healthy replicas. Only touched from the event loop."""
+
+    def __init__(self, urls: list):
+        self.replicas = [Replica(index, url) for index, url in enumerate(urls)]
+        self._order = itertools.cycle(self.replicas)
+
+    def pick(self):
+        """The next healthy replica's index, or None when there is none."""
+        for _ in range(len(self.replicas)):
+            replica = next(self._order)
+            if replica.healthy:
+                return replica.index
+        return None
+
+    def mark_unhealthy(self, index: int, reason):
+        replica = self.replicas[index]
+        if replica.healthy:
+            logger.warning("Read replica %d taken out of rotation: %s", index, reason)
+        replica.healthy = False
+
+    async def check(self, replica: Replica):
+        db = open_session(replica.index)
+        try:
+            if replica.is_postgres:
+                replica.lag = float(await db.scalar(_LAG_QUERY) or 0)
+            else:
+                await db.scalar(text("SELECT version_num FROM alembic_version"))
+        except Exception as e:
+            self.mark_unhealthy(replica.index, e)
+            return
+        finally:
+            await db.close()
+        if REPLICA_MAX_LAG_SECONDS and replica.lag > REPLICA_MAX_LAG_SECONDS:
+            self.mark_unhealthy(replica.index, f"{replica.lag:.1f}s behind the primary")
+        elif not replica.healthy:
+            logger.info("Read replica %d back in rotation", replica.index)
+            replica.healthy = True
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+
+Gauge(
+    "db_replica_healthy", "1 while a read replica is in rotation", ["replica"],
+    callback=lambda: {(str(r.index),): int(r.healthy) for r in replica_set.replicas},
+)
+Gauge(
+    "db_replica_lag_seconds", "Replay lag measured by the last health check (Postgres)", ["replica"],
+    callback=lambda: {(str(r.index),): r.lag for r in replica_set.replicas},
+)
+
+class MemoryStickyStore:
+    """Per-process ``user_id -> primary-until`` LRU."""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._until = OrderedDict()
+
+    async def mark(self, user_id: int, seconds: float):
+        self._until[user_id] = time.monotonic() + seconds
+        self._until.move_to_end(user_id)
+        while len(self._until) > self.max_users:
+            self._until.popitem(last=False)
+
+    async def is_sticky(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._until[user_id]
+            return False
+        return True
+
+class RedisStickyStore:
+    """Marks shared by every worker, as keys that expire with the window."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("REPLICA_STICKY_STORE is a redis:// URL but the 'redis' package is not installed")
+        self.client = redis.from_url(url)
+
+    async def mark(self, user_id: int, seconds: float):
+        await self.client.set(f"primary:{user_id}", 1, px=max(1, int(seconds * 1000)))
+
+    async def is_sticky(self, user_id: int) -> bool:
+        return bool(await self.client.exists(f"primary:{user_id}"))
+
+def _build_store():
+    if REPLICA_STICKY_STORE.startswith(("redis://", "rediss://")):
+        return RedisStickyStore(REPLICA_STICKY_STORE)
+    return MemoryStickyStore(REPLICA_STICKY_MAX_USERS)
+
+sticky_store = _build_store() if replica_set.replicas else None
+
+async def _is_sticky(user_id: int) -> bool:
+    try:
+        return await sticky_store.is_sticky(user_id)
+    except Exception:
+        # Unknown, so err towards fresh data
+        logger.warning("Sticky store unavailable; reading from the primary", exc_info=True)
+        return True
+
+async def get_read_db(user: Principal = Depends(get_current_user)):
+    """``get_db`` for read-only routes: a replica session unless the user wrote recently."""
+    replica, target = None, "primary"
+    if replica_set.replicas:
+        if await _is_sticky(user.user_id):
+            target = "sticky"
+        else:
+            replica = replica_set.pick()
+            target = "primary" if replica is None else "replica"
+    READ_SESSIONS.inc(target=target)
+    db = open_session(replica)
+    try:
+        yield db
+    except exc.DBAPIError as e:
+        if replica is not None and (e.connection_invalidated or isinstance(e, exc.OperationalError)):
+            replica_set.mark_unhealthy(replica, e.orig)
+        raise
+    finally:
+        await db.close()
+
+class ReadYourWritesMiddleware:
+    """Keeps each user's reads on the primary for a while after they write."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if sticky_store is None or scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            return await self.app(scope, receive, send)
+        token = bearer_token(scope)
+        try:
+            user_id = authenticate_token(token).user_id if token else None
+        except TokenError:
+            user_id = None
+        if user_id is None:
+            return await self.app(scope, receive, send)
+        # Marked before the write starts as well as after it ends: reads sent while it runs also see it
+        await self._mark(user_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self._mark(user_id)
+
+    async def _mark(self, user_id: int):
+        try:
+            await sticky_store.mark(user_id, REPLICA_STICKY_SECONDS)
+        except Exception:
+            logger.warning("Could not record a write for read-your-writes", exc_info=True)
+
+_task = None
+
+async def _check_forever():
+    while True:
+        await asyncio.sleep(REPLICA_HEALTH_INTERVAL_SECONDS)
+        try:
+            await replica_set.check_all()
+        except Exception:
+            logger.exception("Replica health check failed")
+
+async def start():
+    """Check every replica once, then keep checking in the background."""
+    global _task
+    if not replica_set.replicas or _task is not None:
+        return
+    await replica_set.check_all()
+    _task = asyncio.create_task(_check_forever())
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -0,0 +1,30 @@
+"""JSON bodies serialized in one pass per response.
+
+FastAPI's default path validates each returned object against the response
+model, converts it back to plain Python with ``jsonable_encoder``, and then
+encodes it. For list routes ``dump_json`` validates the whole payload with one
+cached ``TypeAdapter`` and lets pydantic-core write the bytes directly. Rows
+from column-only ``select()``s validate through ``from_attributes`` like ORM
+objects do.
+"""
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+_adapters = {}
+
+def adapter(schema) -> TypeAdapter:
+    if schema not in _adapters:
+        _adapters[schema] = TypeAdapter(schema)
+    return _adapters[schema]
+
+def dump_json(schema, data) -> bytes:
+    schema_adapter = adapter(schema)
+    return schema_adapter.dump_json(schema_adapter.validate_python(data, from_attributes=True))
+
+def typed_response(schema, data, headers: dict | None = None) -> Response:
+    return Response(content=dump_json(schema, data), media_type="application/json", headers=headers)
+
+def select_fields(model, schema):
+    """``select()`` of just the columns ``schema`` exposes: plain rows, no identity map or ORM instances."""
+    return select(*(getattr(model, name) for name in schema.model_fields))
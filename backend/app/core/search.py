@@ -0,0 +1,126 @@
+"""Full-text search over task titles, task descriptions and comments.
+
+Postgres matches generated ``tsvector`` columns through GIN indexes and ranks
+with ``ts_rank``. Title hits outrank description hits. SQLite matches
+external-content FTS5 tables and ranks with ``bm25``. Migration 0005 creates
+both. Every query term is a prefix match, and results are limited to projects
+the caller owns or is a member of.
+"""
+import re
+
+from sqlalchemy import bindparam, column, func, literal, literal_column, select, table, union_all
+
+from app.core.access import accessible_project_ids
+from app.database import DATABASE_URL
+from app.models.comment import Comment
+from app.models.task import Task
+
+SEARCH_CONFIG = "english"
+MAX_TERMS = 8
+SNIPPET_WORDS = 12
+# Plain-text highlight markers: snippets carry user content and must not be rendered as HTML
+HIGHLIGHT_START, HIGHLIGHT_STOP = "**", "**"
+
+# table -> (FTS5 table, indexed columns)
+SQLITE_FTS = {
+    "tasks": ("tasks_fts", ["title", "description"]),
+    "comments": ("comments_fts", ["content"]),
+}
+
+# Search-only schema objects the models don't map; kept out of autogenerate/check_schema
+_UNMAPPED_TABLES = {fts for fts, _ in SQLITE_FTS.values()}
+_UNMAPPED_NAMES = {"search_vector", "ix_tasks_search_vector", "ix_comments_search_vector"}
+
+_TERM = re.compile(r"[^\W_]+")
+
+def sqlite_trigger_ddl(table_name: str) -> list:
+    """Triggers mirroring writes on ``table_name`` into its FTS5 table."""
+    fts, columns = SQLITE_FTS[table_name]
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic ``include_object`` hook that hides the search index objects."""
+    if type_ == "table":
+        return not any(name == fts or name.startswith(f"{fts}_") for fts in _UNMAPPED_TABLES)
+    return name not in _UNMAPPED_NAMES
+
+def search_terms(q: str) -> list:
+    return _TERM.findall(q.lower())[:MAX_TERMS]
+
+def _postgres_search(user_id: int, terms: list, offset: int, limit: int):
+    query = func.to_tsquery(SEARCH_CONFIG, bindparam("q", " & ".join(f"{t}:*" for t in terms)))
+    task_vector = literal_column("tasks.search_vector")
+    comment_vector = literal_column("comments.search_vector")
+    projects = accessible_project_ids(user_id)
+    hits = union_all(
+        select(
+            literal("task").label("kind"), Task.id.label("id"), Task.id.label("task_id"),
+            Task.project_id, Task.title, func.concat_ws(" ", Task.title, Task.description).label("body"),
+            func.ts_rank(task_vector, query).label("rank"),
+        ).where(task_vector.op("@@")(query), Task.project_id.in_(projects)),
+        select(
+            literal("comment"), Comment.id, Comment.task_id,
+            Task.project_id, Task.title, Comment.content,
+            func.ts_rank(comment_vector, query),
+        ).join(Task, Task.id == Comment.task_id).where(comment_vector.op("@@")(query), Task.project_id.in_(projects)),
+    ).subquery()
+    page = (
+        select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id).offset(offset).limit(limit).subquery()
+    )
+    # ts_headline re-parses the document, so only run it for the rows on this page
+    snippet = func.ts_headline(
+        SEARCH_CONFIG, page.c.body, query, f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+        f"MaxWords={SNIPPET_WORDS}, MinWords=4, MaxFragments=1",
+    )
+    return select(
+        page.c.kind, page.c.id, page.c.task_id, page.c.project_id, page.c.title,
+        snippet.label("snippet"), page.c.rank,
+    ).order_by(page.c.rank.desc(), page.c.kind, page.c.id)
+
+def _sqlite_search(user_id: int, terms: list, offset: int, limit: int):
+    query = bindparam("q", " ".join(f'"{t}"*' for t in terms))
+    tasks_fts = table("tasks_fts", column("rowid"))
+    comments_fts = table("comments_fts", column("rowid"))
+    projects = accessible_project_ids(user_id)
+
+    def snippet(fts):
+        return func.snippet(literal_column(fts), -1, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", SNIPPET_WORDS)
+
+    hits = union_all(
+        select(
+            literal("task").label("kind"), Task.id.label("id"), Task.id.label("task_id"),
+            Task.project_id, Task.title, snippet("tasks_fts").label("snippet"),
+            (-func.bm25(literal_column("tasks_fts"), 10.0, 5.0)).label("rank"),
+        )
+        .select_from(tasks_fts).join(Task, Task.id == tasks_fts.c.rowid)
+        .where(literal_column("tasks_fts").op("MATCH")(query), Task.project_id.in_(projects)),
+        select(
+            literal("comment"), Comment.id, Comment.task_id,
+            Task.project_id, Task.title, snippet("comments_fts"),
+            -func.bm25(literal_column("comments_fts")),
+        )
+        .select_from(comments_fts).join(Comment, Comment.id == comments_fts.c.rowid)
+        .join(Task, Task.id == Comment.task_id)
+        .where(literal_column("comments_fts").op("MATCH")(query), Task.project_id.in_(projects)),
+    ).subquery()
+    return select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id).offset(offset).limit(limit)
+
+def search_statement(user_id: int, terms: list, offset: int, limit: int):
+    """Ranked hits, best first: kind, id, task_id, project_id, title, snippet, rank."""
+    if DATABASE_URL.startswith("sqlite"):
+        return _sqlite_search(user_id, terms, offset, limit)
+    return _postgres_search(user_id, terms, offset, limit)
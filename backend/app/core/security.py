@@ -1,42 +1,123 @@
-from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hmac
+import multiprocessing
+import os
+import time
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import Counter, Histogram
+from app.core import passwords
+from app.core.passwords import hash_password, verify_and_update_password
+from app.core.tokens import ExpiredTokenError, Principal, TokenError, authenticate_token
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs in a bounded process pool so a login burst cannot stall the event loop.
+# PASSWORD_HASH_WORKERS=0 falls back to the threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(os.cpu_count() or 1, 4)))
+# Calls allowed to wait for a worker before new ones are rejected with 503
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 32))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
 
-def hash_password(password:str)->str:
-    return pwd_context.hash(password)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent hashing or verifying passwords, including queueing", ["op"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected", "Password operations shed because the hashing pool was full", ["op"]
+)
 
-def verify_password(plainPassword:str, hashedPassword:str)->bool:
-    return pwd_context.verify(plainPassword, hashedPassword)
+_hash_executor = None
+_hash_in_flight = 0
 
-from datetime import datetime, timedelta
-from jose import jwt
-import os
+def _get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn: forking a process that already runs threads and an event loop is unsafe
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_executor
 
-JWT_SECRET = os.getenv("JWT_SECRET", "+MatS/dyB4K6UPxj9QvlUIvTPkgtyMrcN5StdIG3xPQ=")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-JWT_EXPIRATION_MINUTES = int(os.getenv("JWT_EXPIRATION_MINUTES", 60))
+async def warm_hash_workers():
+    """Start the hashing processes and load bcrypt in each, so the first logins after a cold start do not wait."""
+    executor = _get_hash_executor()
+    if executor is None:
+        await run_in_threadpool(passwords.warm_up)
+        return
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(executor, passwords.warm_up) for _ in range(PASSWORD_HASH_WORKERS)))
 
-def create_access_token(data:dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=JWT_EXPIRATION_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
-    return encoded_jwt
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
 
-def decode_access_token(token: str):
+async def _run_password_op(op: str, fn, *args):
+    global _hash_in_flight
+    if _hash_in_flight >= max(PASSWORD_HASH_WORKERS, 1) + PASSWORD_HASH_QUEUE_LIMIT:
+        PASSWORD_HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is busy, please retry",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _hash_in_flight += 1
+    start = time.perf_counter()
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except Exception as e:
-        return None
+        executor = _get_hash_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _hash_in_flight -= 1
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, op=op)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_op("hash", hash_password, password)
+
+async def verify_and_update_password_async(plainPassword: str, hashedPassword: str):
+    return await _run_password_op("verify", verify_and_update_password, plainPassword, hashedPassword)
 
-from fastapi import Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+def _principal_or_401(token: str) -> Principal:
+    try:
+        return authenticate_token(token)
+    except ExpiredTokenError:
+        detail = "Token has expired"
+    except TokenError:
+        detail = "Invalid token"
+    raise HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Principal:
+    return _principal_or_401(credentials.credentials)
+
+async def get_stream_user(
+    access_token: str | None = Query(None),
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+) -> Principal:
+    """``get_current_user`` for EventSource clients, which cannot send headers: also accepts ``?access_token=``."""
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return _principal_or_401(token)
+
+async def require_admin(user: Principal = Depends(get_current_user)) -> Principal:
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+# Static bearer token for Prometheus scrapes of /api/metrics; admins can always read it
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    if payload is None:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    return payload  
+async def require_metrics_access(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+) -> None:
+    """METRICS_TOKEN as the bearer token, or an admin's access token."""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return
+    await require_admin(_principal_or_401(credentials.credentials))
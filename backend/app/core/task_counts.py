@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app.database import upsert
+from app.models.task import TaskPriority, TaskStatus
+from app.models.task_count import ProjectTaskCount
+
+class TaskCountDeltas:
+    """Accumulates counter changes for a unit of work and applies them in one upsert.
+
+    Call ``remove`` with a task's values before changing it and ``add`` after,
+    then ``await apply(db)`` before committing.
+    """
+
+    def __init__(self):
+        self._deltas = defaultdict(int)
+
+    def _track(self, project_id, status, priority, assignee_id, sign):
+        if status is not None:
+            self._deltas[(project_id, "status", TaskStatus(status).name)] += sign
+        if priority is not None:
+            self._deltas[(project_id, "priority", TaskPriority(priority).name)] += sign
+        self._deltas[(project_id, "assignee", str(assignee_id) if assignee_id is not None else "none")] += sign
+
+    def add(self, task):
+        self._track(task.project_id, task.status, task.priority, task.assignee_id, 1)
+
+    def remove(self, task):
+        self._track(task.project_id, task.status, task.priority, task.assignee_id, -1)
+
+    def add_values(self, project_id, status, priority, assignee_id):
+        self._track(project_id, status, priority, assignee_id, 1)
+
+    def remove_values(self, project_id, status, priority, assignee_id):
+        self._track(project_id, status, priority, assignee_id, -1)
+
+    async def apply(self, db):
+        rows = [
+            {"project_id": project_id, "dimension": dimension, "value": value, "count": delta}
+            for (project_id, dimension, value), delta in self._deltas.items()
+            if delta
+        ]
+        self._deltas.clear()
+        if not rows:
+            return
+        stmt = upsert(ProjectTaskCount.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "dimension", "value"],
+            set_={"count": ProjectTaskCount.count + stmt.excluded.count},
+        )
+        await db.execute(stmt, rows)
+
+async def load_summaries(db, project_ids) -> dict:
+    """``{project_id: summary}`` for the given projects, read from the counter table only."""
+    summaries = {
+        project_id: {"project_id": project_id, "total": 0, "by_status": {}, "by_priority": {}, "by_assignee": {}}
+        for project_id in project_ids
+    }
+    if not summaries:
+        return summaries
+    rows = await db.execute(
+        select(ProjectTaskCount.project_id, ProjectTaskCount.dimension, ProjectTaskCount.value, ProjectTaskCount.count)
+        .where(ProjectTaskCount.project_id.in_(summaries.keys()), ProjectTaskCount.count != 0)
+    )
+    for project_id, dimension, value, count in rows.all():
+        summary = summaries[project_id]
+        if dimension == "status":
+            summary["by_status"][TaskStatus[value].value] = count
+        elif dimension == "priority":
+            summary["by_priority"][TaskPriority[value].value] = count
+        else:
+            # Every task has exactly one assignee bucket, so these sum to the total
+            summary["by_assignee"][value] = count
+            summary["total"] += count
+    return summaries
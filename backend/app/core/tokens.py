@@ -0,0 +1,177 @@
+"""Access tokens: signing and verifying JWTs, and the ``Principal`` they carry.
+
+HMAC tokens (HS256/384/512) are built and checked directly with ``hmac`` and
+``json``. python-jose, which is slow to import, is loaded only for other
+algorithms. Verified tokens are cached per worker, so a request with a known
+token costs a hash and a dict lookup. Nothing here depends on FastAPI, so
+middleware can authenticate a request before routing; the route dependencies
+are in ``app.core.security``.
+"""
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+JWT_SECRET = os.getenv("JWT_SECRET", "+MatS/dyB4K6UPxj9QvlUIvTPkgtyMrcN5StdIG3xPQ=")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_EXPIRATION_MINUTES = int(os.getenv("JWT_EXPIRATION_MINUTES", 60))
+# Verified tokens are cached until they expire, or for at most JWT_CACHE_TTL_SECONDS
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+JWT_CACHE_TTL_SECONDS = int(os.getenv("JWT_CACHE_TTL_SECONDS", 300))
+# Accounts allowed to use admin-only diagnostics such as request profiling
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+_JWT_KEY = JWT_SECRET.encode("utf-8")
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+class TokenError(Exception):
+    """The bearer token is malformed, tampered with or otherwise unusable."""
+
+class ExpiredTokenError(TokenError):
+    pass
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authenticated caller, as carried in the access token."""
+    user_id: int
+    email: str
+    expires_at: int
+
+    @property
+    def is_admin(self) -> bool:
+        return self.email.lower() in ADMIN_EMAILS
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def create_access_token(data:dict):
+    """Sign ``data`` plus an ``exp`` claim. HMAC tokens are built directly; python-jose
+    (slow to import) is only loaded for other algorithms."""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(minutes=JWT_EXPIRATION_MINUTES)
+    to_encode.update({"exp": calendar.timegm(expire.utctimetuple())})
+    digestmod = _HMAC_DIGESTS.get(JWT_ALGORITHM)
+    if digestmod is None:
+        from jose import jwt
+        return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    header = _b64encode(json.dumps({"alg": JWT_ALGORITHM, "typ": "JWT"}, separators=(",", ":")).encode())
+    payload = _b64encode(json.dumps(to_encode, separators=(",", ":")).encode())
+    signature = hmac.new(_JWT_KEY, f"{header}.{payload}".encode("ascii"), digestmod).digest()
+    return f"{header}.{payload}.{_b64encode(signature)}"
+
+def _decode_with_jose(token: str) -> dict:
+    from jose import jwt
+    from jose.exceptions import ExpiredSignatureError, JWTError
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except ExpiredSignatureError:
+        raise ExpiredTokenError("Token has expired")
+    except JWTError as e:
+        raise TokenError(str(e))
+
+def decode_access_token(token: str) -> dict:
+    """Verify ``token`` and return its claims, raising ``TokenError`` otherwise.
+
+    HMAC tokens are checked directly with ``hmac``/``json``; other algorithms
+    go through python-jose.
+    """
+    digestmod = _HMAC_DIGESTS.get(JWT_ALGORITHM)
+    if digestmod is None:
+        return _decode_with_jose(token)
+    try:
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_b64decode(header_segment))
+        signature = _b64decode(signature_segment)
+    except (ValueError, binascii.Error):
+        raise TokenError("Malformed token")
+    if not isinstance(header, dict) or header.get("alg") != JWT_ALGORITHM:
+        raise TokenError("The specified alg value is not allowed")
+    signing_input = f"{header_segment}.{payload_segment}".encode("ascii", "replace")
+    expected = hmac.new(_JWT_KEY, signing_input, digestmod).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise TokenError("Signature verification failed")
+    try:
+        payload = json.loads(_b64decode(payload_segment))
+    except (ValueError, binascii.Error):
+        raise TokenError("Malformed token")
+    if not isinstance(payload, dict):
+        raise TokenError("Malformed token")
+    now = time.time()
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)):
+        raise TokenError("Token has no valid expiration")
+    if exp <= now:
+        raise ExpiredTokenError("Token has expired")
+    nbf = payload.get("nbf")
+    if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
+        raise TokenError("Token is not yet valid")
+    return payload
+
+class TokenCache:
+    """Bounded LRU of verified principals keyed by the token's SHA-256 digest.
+
+    Entries never outlive the token's ``exp`` and are capped at ``ttl`` seconds.
+    Only touched from the event loop, so it needs no locking.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key: bytes):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        principal, valid_until = entry
+        if valid_until <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, key: bytes, principal: Principal):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (principal, min(principal.expires_at, time.time() + self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+token_cache = TokenCache(JWT_CACHE_SIZE, JWT_CACHE_TTL_SECONDS)
+
+def authenticate_token(token: str) -> Principal:
+    key = hashlib.sha256(token.encode("utf-8", "replace")).digest()
+    principal = token_cache.get(key)
+    if principal is not None:
+        return principal
+    payload = decode_access_token(token)
+    try:
+        principal = Principal(
+            user_id=int(payload["user_id"]), email=payload.get("email", ""), expires_at=int(payload["exp"])
+        )
+    except (KeyError, TypeError, ValueError):
+        raise TokenError("Token is missing required claims")
+    token_cache.put(key, principal)
+    return principal
+
+def bearer_token(scope):
+    """The token of an ``Authorization: Bearer`` header in an ASGI scope, for middleware."""
+    for key, value in scope.get("headers", ()):
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" and token else None
+    return None
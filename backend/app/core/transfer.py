@@ -0,0 +1,243 @@
+"""Project export and import as JSONL or CSV.
+
+One record per line (JSONL) or row (CSV), tagged by ``record``:
+
+    {"record": "project", "title": "Launch", "description": null}
+    {"record": "task", "id": 12, "title": "Draft", "status": "To-do", "priority": "Medium", ...}
+    {"record": "comment", "id": 40, "task_id": 12, "user_id": 3, "content": "...", "created_at": "..."}
+
+Exports put the project first, then every task, then every comment. They
+stream from server-side cursors, so memory stays flat however large the
+project is.
+
+Imports read the same layout. Records are validated in batches (tasks against
+``TaskCreate`` plus their file ``id``) and inserted with one executemany per
+batch, one transaction per batch. A comment's ``task_id`` refers to the ``id`` of a task earlier in
+the file. Assignees and authors that do not exist here are dropped: the
+assignee becomes unassigned and the importing user becomes the author.
+"""
+import collections
+import csv
+import io
+import itertools
+import json
+import os
+
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.task_counts import TaskCountDeltas
+from app.database import open_session
+from app.models.comment import Comment
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.comment import CommentImport
+from app.schemas.task import TaskImport
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = [
+    "record", "id", "task_id", "title", "description", "status", "priority", "assignee_id", "user_id", "content",
+    "created_at",
+]
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+# Validation errors reported back before giving up on listing them
+MAX_REPORTED_ERRORS = 20
+
+_tasks_adapter = TypeAdapter(list[TaskImport])
+_comments_adapter = TypeAdapter(list[CommentImport])
+
+class InvalidImport(Exception):
+    """The upload is malformed; ``errors`` lists ``{"row", "error"}`` items."""
+
+    def __init__(self, errors: list):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+def _task_record(row) -> dict:
+    return {
+        "record": "task", "id": row.id, "title": row.title, "description": row.description,
+        "status": row.status.value if row.status else None,
+        "priority": row.priority.value if row.priority else None,
+        "assignee_id": row.assignee_id,
+    }
+
+def _comment_record(row) -> dict:
+    return {
+        "record": "comment", "id": row.id, "task_id": row.task_id, "user_id": row.user_id,
+        "content": row.content, "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+def _encode_jsonl(records: list) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+def _encode_csv(records: list, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode()
+
+def export_response(project, format: str) -> StreamingResponse:
+    """Stream ``project`` with all of its tasks and comments in ``format``."""
+    encode = _encode_csv if format == "csv" else _encode_jsonl
+    tasks = (
+        select(Task.id, Task.title, Task.description, Task.status, Task.priority, Task.assignee_id)
+        .where(Task.project_id == project.id)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    comments = (
+        select(Comment.id, Comment.task_id, Comment.user_id, Comment.content, Comment.created_at)
+        .join(Task, Task.id == Comment.task_id)
+        .where(Task.project_id == project.id)
+        .order_by(Comment.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    first = {"record": "project", "title": project.title, "description": project.description}
+
+    async def generate():
+        # Own session: the body is produced after the request handler has returned
+        db = open_session()
+        try:
+            yield _encode_csv([first], header=True) if format == "csv" else _encode_jsonl([first])
+            for stmt, to_record in ((tasks, _task_record), (comments, _comment_record)):
+                batch = []
+                async for row in await db.stream(stmt):
+                    batch.append(to_record(row))
+                    if len(batch) >= EXPORT_BATCH_SIZE:
+                        yield encode(batch)
+                        batch = []
+                if batch:
+                    yield encode(batch)
+        finally:
+            await db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"project-{project.id}.{format}"
+    return StreamingResponse(
+        generate(), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _parse(text, format: str):
+    if format == "csv":
+        for row in csv.DictReader(text):
+            yield {key: (value if value != "" else None) for key, value in row.items() if key}
+        return
+    for line in text:
+        if line.strip():
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Expected a JSON object")
+            yield record
+
+def read_records(file, format: str):
+    """Iterate the uploaded records as dicts (CSV blanks become None); blocking, so consume off the loop."""
+    number = 0
+    try:
+        for number, record in enumerate(_parse(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""), format), 1):
+            yield record
+    except (ValueError, csv.Error) as e:
+        # ValueError covers bad JSON and undecodable bytes
+        raise InvalidImport([{"row": number + 1, "error": str(e)}])
+
+def _validate(adapter: TypeAdapter, records: list, rows: list) -> list:
+    try:
+        return adapter.validate_python(records)
+    except ValidationError as e:
+        raise InvalidImport([
+            {"row": rows[error["loc"][0]], "error": f"{'.'.join(map(str, error['loc'][1:]))}: {error['msg']}"}
+            for error in e.errors()[:MAX_REPORTED_ERRORS]
+        ])
+
+async def _existing_users(db, ids) -> set:
+    ids = {user_id for user_id in ids if user_id is not None}
+    if not ids:
+        return set()
+    return set((await db.scalars(select(User.id).where(User.id.in_(ids)))).all())
+
+async def import_records(db, project_id: int, user_id: int, records) -> dict:
+    """Insert ``records`` into ``project_id`` and return ``{"tasks": n, "comments": n}``.
+
+    Project records are skipped; the caller reads the first one. Commits once
+    per batch and raises ``InvalidImport`` at the first batch with a bad row.
+    Earlier batches are already committed by then, so the caller should
+    discard the project.
+    """
+    task_ids = {}  # id in the file -> new id
+    counts = {"tasks": 0, "comments": 0}
+    row_number = 0
+    while True:
+        batch = await run_in_threadpool(list, itertools.islice(records, IMPORT_BATCH_SIZE))
+        if not batch:
+            return counts
+        tasks, task_rows, comments, comment_rows, errors = [], [], [], [], []
+        for record in batch:
+            row_number += 1
+            kind = record.get("record")
+            if kind == "task":
+                tasks.append(record)
+                task_rows.append(row_number)
+            elif kind == "comment":
+                comments.append(record)
+                comment_rows.append(row_number)
+            elif kind != "project":
+                errors.append({"row": row_number, "error": f"Unknown record type {kind!r}"})
+        if errors:
+            raise InvalidImport(errors[:MAX_REPORTED_ERRORS])
+        tasks = _validate(_tasks_adapter, tasks, task_rows)
+        comments = _validate(_comments_adapter, comments, comment_rows)
+        batch_task_ids = {task.id for task in tasks}
+        for comment, row in zip(comments, comment_rows):
+            if comment.task_id not in task_ids and comment.task_id not in batch_task_ids:
+                errors.append({"row": row, "error": "task_id does not match a task earlier in the file"})
+        if errors:
+            raise InvalidImport(errors[:MAX_REPORTED_ERRORS])
+
+        users = await _existing_users(
+            db, [task.assignee_id for task in tasks] + [comment.user_id for comment in comments]
+        )
+        if tasks:
+            deltas = TaskCountDeltas()
+            values = []
+            for task in tasks:
+                assignee_id = task.assignee_id if task.assignee_id in users else None
+                values.append({
+                    "title": task.title, "description": task.description, "status": task.status,
+                    "priority": task.priority, "project_id": project_id, "assignee_id": assignee_id,
+                })
+                deltas.add_values(project_id, task.status, task.priority, assignee_id)
+            # Core insert on the table: batched multi-row VALUES ... RETURNING, without the ORM bulk path.
+            # sort_by_parameter_order would send one row per statement on SQLite; ids are assigned in
+            # VALUES order, so sorting them lines them up with the rows instead
+            new_ids = sorted((await db.execute(insert(Task.__table__).returning(Task.id), values)).scalars().all())
+            task_ids.update((task.id, new_id) for task, new_id in zip(tasks, new_ids) if task.id is not None)
+            await deltas.apply(db)
+            counts["tasks"] += len(tasks)
+        if comments:
+            # executemany needs one set of keys: comments without created_at keep the server default
+            dated, undated = [], []
+            for comment in comments:
+                value = {
+                    "content": comment.content, "task_id": task_ids[comment.task_id],
+                    "user_id": comment.user_id if comment.user_id in users else user_id,
+                }
+                if comment.created_at is not None:
+                    dated.append({**value, "created_at": comment.created_at})
+                else:
+                    undated.append(value)
+            for values in (dated, undated):
+                if values:
+                    await db.execute(insert(Comment.__table__), values)
+            added = collections.Counter(task_ids[comment.task_id] for comment in comments)
+            await db.execute(
+                update(Task.__table__)
+                .where(Task.__table__.c.id == bindparam("task_pk"))
+                .values(comment_count=Task.__table__.c.comment_count + bindparam("added")),
+                [{"task_pk": task_pk, "added": n} for task_pk, n in added.items()],
+            )
+            counts["comments"] += len(comments)
+        await db.commit()
@@ -0,0 +1,106 @@
+"""Start-up work that must not delay the first health check.
+
+Importing the app touches no database. ``warm_up`` does the slow parts once
+the server is listening:
+
+1. wait for the database, retrying with backoff;
+2. check that the schema is at the Alembic head;
+3. connect the event broker and start the job workers;
+4. check the read replicas, if any, and keep checking them;
+5. start the bcrypt processes.
+
+``/api/health`` answers from the moment uvicorn binds, which keeps platform
+liveness checks on cold instances happy. ``/api/health/ready`` returns 503
+until warm-up has finished, and gives the reason if it has failed.
+
+STARTUP_WARMUP=blocking runs the same steps inside the startup event, before
+uvicorn accepts connections (the behaviour before this existed). The default
+"background" runs them as a task.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import text
+
+from app.core import replicas
+from app.core.events import broker
+from app.core.jobs import runner as job_runner
+from app.core.metrics import Gauge
+from app.core.security import warm_hash_workers
+from app.database import open_session
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+# Give up on the database after this long; /api/health/ready then reports the failure
+STARTUP_DB_TIMEOUT_SECONDS = float(os.getenv("STARTUP_DB_TIMEOUT_SECONDS", 120))
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic")
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SECONDS = Gauge("startup_warmup_seconds", "Time from startup to ready, per step", ["step"])
+
+class Readiness:
+    def __init__(self):
+        self.status = "starting"
+        self.detail = None
+
+readiness = Readiness()
+_task = None
+
+async def _wait_for_database():
+    deadline = time.monotonic() + STARTUP_DB_TIMEOUT_SECONDS
+    delay = 0.5
+    while True:
+        db = open_session()
+        try:
+            return await db.scalar(text("SELECT version_num FROM alembic_version"))
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                raise RuntimeError(f"Database unavailable: {e}") from e
+            logger.warning("Database not ready, retrying in %.1fs: %s", delay, e)
+        finally:
+            await db.close()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 10)
+
+def _migration_head():
+    # Imported here: alembic loads every revision module, which is only needed once
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+
+async def warm_up():
+    started = time.perf_counter()
+    try:
+        revision = await _wait_for_database()
+        WARMUP_SECONDS.set(time.perf_counter() - started, step="database")
+        head = await asyncio.to_thread(_migration_head)
+        if revision != head:
+            raise RuntimeError(f"Schema is at revision {revision}, expected {head}; run `alembic upgrade head`")
+        try:
+            await broker.start()
+        except Exception:
+            # Not fatal: the events route retries the connection when a board subscribes
+            logger.exception("Event broker unavailable at startup")
+        await job_runner.start()
+        await replicas.start()
+        await warm_hash_workers()
+    except Exception as e:
+        readiness.status, readiness.detail = "failed", str(e)
+        logger.exception("Start-up warm-up failed")
+        return
+    WARMUP_SECONDS.set(time.perf_counter() - started, step="ready")
+    readiness.status = "ready"
+
+async def start():
+    global _task
+    if STARTUP_WARMUP == "blocking":
+        await warm_up()
+    else:
+        _task = asyncio.create_task(warm_up())
+
+async def stop():
+    if _task is not None and not _task.done():
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
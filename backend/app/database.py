@@ -1,13 +1,276 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.concurrency import run_in_threadpool
+import importlib
 import os
+import time
 from dotenv import load_dotenv
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.query_budget import instrument_engine
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Comma-separated read replicas of DATABASE_URL; read-only routes use them (see app/core/replicas.py)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DATABASE_ASYNC=true serves requests through asyncpg/aiosqlite on the event loop;
+# otherwise each DB call runs on a blocking driver in Starlette's threadpool.
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
 
-Base = declarative_base()
\ No newline at end of file
+# Connections this service may hold on the primary, summed over its WEB_CONCURRENCY worker
+# processes (python -m app.serve exports both). Each worker's pool then defaults to an
+# equal share, half kept open and half overflow; 0 keeps the fixed defaults.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+def _pool_defaults() -> tuple:
+    if not DB_MAX_CONNECTIONS:
+        return 5, 10
+    share = DB_MAX_CONNECTIONS // WEB_CONCURRENCY
+    if os.getenv("EVENT_BROKER", "local") == "postgres":
+        share -= 1  # the broker's LISTEN connection is opened outside the pool
+    share = max(share, 2)
+    return share // 2, share - share // 2
+
+# Connection pool, per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", _pool_defaults()[0]))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", _pool_defaults()[1]))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Server-side statement timeout in milliseconds (Postgres only, 0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+# Behind PgBouncer in transaction mode: no startup options, no prepared statement cache.
+# Set statement_timeout on the database role instead.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["pool"]
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"]
+)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited."""
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=self.metrics_label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, pool=self.metrics_label)
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+def to_async_url(url: str) -> str:
+    """Swap the driver in a sync DATABASE_URL for its asyncio counterpart."""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    if url == "sqlite://" or ":memory:" in url:
+        return {}
+    options = {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.startswith("postgres"):
+        connect_args = {}
+        if DB_PGBOUNCER:
+            if is_async:
+                connect_args = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        elif DB_STATEMENT_TIMEOUT_MS:
+            if is_async:
+                connect_args = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+            else:
+                connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+        options["connect_args"] = connect_args
+    return options
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+# expire_on_commit=False matches AsyncSessionLocal: serializing a committed object must not lazy-load
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+async_engine = (
+    create_async_engine(to_async_url(DATABASE_URL), **engine_options(DATABASE_URL, is_async=True))
+    if DATABASE_ASYNC else None
+)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DATABASE_ASYNC else None
+)
+
+def create_replica_engine(url: str):
+    """An instrumented engine (and pool) for one replica, in the same mode as the primary."""
+    if DATABASE_ASYNC:
+        replica = create_async_engine(to_async_url(url), **engine_options(url, is_async=True))
+        instrument_engine(replica.sync_engine)
+    else:
+        replica = create_engine(url, **engine_options(url))
+        instrument_engine(replica)
+    return replica
+
+replica_engines = [create_replica_engine(url) for url in DATABASE_REPLICA_URLS]
+
+Base = declarative_base()
+
+MODEL_MODULES = ("user", "project", "task", "comment", "task_count", "job", "activity")
+
+def import_models():
+    """Import every model module, so all tables are on ``Base.metadata`` (migrations, schema checks)."""
+    for module in MODEL_MODULES:
+        importlib.import_module(f"app.models.{module}")
+
+def upsert(table):
+    """INSERT construct with ``on_conflict_do_update`` for the configured dialect."""
+    if DATABASE_URL.startswith("sqlite"):
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def pool_stats() -> dict:
+    """Checked-out connections and saturation for each live pool."""
+    stats = {}
+    engines = [("sync", engine), ("async", async_engine and async_engine.sync_engine)]
+    engines += [
+        (f"replica{index}", replica.sync_engine if DATABASE_ASYNC else replica)
+        for index, replica in enumerate(replica_engines)
+    ]
+    for label, eng in engines:
+        if eng is None or not isinstance(eng.pool, QueuePool):
+            continue
+        checked_out = eng.pool.checkedout()
+        stats[label] = {
+            "size": eng.pool.size(),
+            "checked_out": checked_out,
+            "overflow": max(eng.pool.overflow(), 0),
+            "saturation": round(checked_out / (DB_POOL_SIZE + DB_MAX_OVERFLOW), 3),
+        }
+    return stats
+
+Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["pool"],
+    callback=lambda: {(label,): s["checked_out"] for label, s in pool_stats().items()},
+)
+Gauge(
+    "db_pool_saturation", "Checked-out connections / (pool size + max overflow)", ["pool"],
+    callback=lambda: {(label,): s["saturation"] for label, s in pool_stats().items()},
+)
+
+class ThreadedSession:
+    """Awaitable facade over a sync ``Session`` with the subset of the
+    ``AsyncSession`` API the routes use, so handlers are written once and
+    run unchanged in either mode. Each call is dispatched to the threadpool."""
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+        return ThreadedStream(result)
+
+    async def stream_scalars(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+        return ThreadedStream(result)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+class ThreadedStream:
+    """Async iterator over a buffered-on-demand sync result, one partition per threadpool hop."""
+
+    def __init__(self, result, partition_size: int = 500):
+        self.result = result
+        self.partition_size = partition_size
+
+    async def __aiter__(self):
+        while True:
+            rows = await run_in_threadpool(self.result.fetchmany, self.partition_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+def open_session(replica: int | None = None):
+    """A new session for the configured mode, on the primary or on replica number ``replica``.
+
+    The replica number is kept in ``session.info["replica"]``. The caller must close it.
+    """
+    bind = {} if replica is None else {"bind": replica_engines[replica]}
+    if DATABASE_ASYNC:
+        session = AsyncSessionLocal(**bind)
+    else:
+        session = ThreadedSession(SessionLocal(**bind))
+    session.info["replica"] = replica
+    return session
+
+async def get_db():
+    db = open_session()
+    try:
+        yield db
+    finally:
+        await db.close()
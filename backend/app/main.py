@@ -1,44 +1,106 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from app.database import Base, engine
-from app.routes import auth, project, task, comment
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse
+from app.routes import auth, project, task, comment, search
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.metrics import render_latest
+from app.core.security import shutdown_hash_executor, require_admin, require_metrics_access
+from app.core.query_budget import QueryCountMiddleware
+from app.core.instrumentation import RequestMetricsMiddleware, profiles
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.replicas import ReadYourWritesMiddleware
+from app.core import replicas
+from app.core.events import broker
+from app.core.jobs import runner as job_runner
+from app.core import warmup
 import os
 
-app = FastAPI(title="ProductiveBoards API", version="1.0.0")
+# orjson for response_model routes; list routes write their own bytes via app.core.responses
+app = FastAPI(title="ProductiveBoards API", version="1.0.0", default_response_class=ORJSONResponse)
 
-origins = [
+# Comma-separated CORS_ORIGINS replaces the defaults; Render preview hosts match the regex
+origins = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()] or [
     "http://localhost:5173",
     "http://localhost:3000",
     "http://localhost:5175",
     "https://productive-dashboard.onrender.com",
-    "https://*.onrender.com",
-    "*",  # Allow all origins for now
 ]
 
+# Notes writes so the writer's next reads skip the replicas; only admitted requests count
+app.add_middleware(ReadYourWritesMiddleware)
+# Rejected requests never reach routing, but still get CORS headers and metrics
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,  
+    allow_origins=origins,
+    allow_origin_regex=os.getenv("CORS_ORIGIN_REGEX", r"https://[a-z0-9-]+\.onrender\.com"),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count", "X-Profile-Id", "Retry-After", "ETag"],
 )
+# Added last = outermost: the metrics middleware runs inside the query tally
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(QueryCountMiddleware)
 
+@app.on_event("startup")
+async def start_warmup():
+    # DB wait, schema check, event broker, job workers and bcrypt processes; see app/core/warmup.py
+    await warmup.start()
 
-Base.metadata.create_all(bind=engine)
+@app.on_event("shutdown")
+async def stop_warmup():
+    await warmup.stop()
+
+@app.on_event("shutdown")
+def stop_hash_workers():
+    shutdown_hash_executor()
+
+@app.on_event("shutdown")
+async def stop_event_broker():
+    await broker.stop()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_runner.stop()
+
+@app.on_event("shutdown")
+async def stop_replica_checks():
+    await replicas.stop()
+
+# The schema is managed by Alembic (`alembic upgrade head`), not created at startup
 
 # Include API routes with /api prefix for clear separation
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(project.router, prefix="/api/projects", tags=["Projects"])
 app.include_router(task.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(comment.router, prefix="/api/comments", tags=["Comments"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
-# Health check endpoint
+# Liveness: answers as soon as the process is up, without touching the database
 @app.get("/api/health")
 def health_check():
     return {"status": "healthy"}
 
+# Readiness: 503 until start-up warm-up has reached the database and checked the schema
+@app.get("/api/health/ready")
+def readiness_check():
+    body = {"status": warmup.readiness.status, "detail": warmup.readiness.detail}
+    return ORJSONResponse(body, status_code=200 if warmup.readiness.status == "ready" else 503)
+
+# Prometheus scrape endpoint (per-route latency, SQL, pool, bcrypt, ...); METRICS_TOKEN or admins only
+@app.get("/api/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+def metrics():
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
+
+# Report for a request profiled with `X-Profile: 1` (PROFILING_ENABLED, admins only)
+@app.get("/api/metrics/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    report = profiles.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(report)
+
 # Test endpoint
 @app.get("/api/test")
 def test_endpoint():
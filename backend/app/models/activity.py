@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index, func
+from app.database import Base
+
+class Activity(Base):
+    """One entry in a project's append-only timeline, see app/core/activity.py."""
+    __tablename__ = "activities"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # No foreign key: the entry outlives the task it describes
+    task_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    kind = Column(String(32), nullable=False)
+    data = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # The feed reads one project newest first, by id
+    __table_args__ = (
+        Index("ix_activities_project_id_id", "project_id", "id"),
+    )
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Index
+from sqlalchemy.orm import relationship, backref
 from app.database import Base
 
 class Comment(Base):
@@ -7,9 +7,13 @@ class Comment(Base):
 
     id = Column(Integer, primary_key=True)
     content = Column(String, nullable=False)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    task = relationship("Task", backref="comments")
-    user = relationship("User")
\ No newline at end of file
+    task = relationship("Task", backref=backref("comments", passive_deletes=True))
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_comments_task_id_id", "task_id", "id"),
+    )
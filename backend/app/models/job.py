@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, Index
+from app.database import Base
+import enum
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class Job(Base):
+    """A unit of background work, see app/core/jobs.py.
+
+    ``run_at`` is when a worker should next look at the job: the scheduled or
+    retry time while queued, and the lease expiry while running, after which
+    another worker may reclaim it.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False)
+    # Enqueuing again with the same key returns the existing job instead of adding one
+    idempotency_key = Column(String(128), nullable=True, unique=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
@@ -1,12 +1,13 @@
-from sqlalchemy import String, Column, Integer, ForeignKey, DateTime, func, Table
+from sqlalchemy import String, Column, Integer, ForeignKey, DateTime, func, Table, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 project_members = Table(
     "project_members",
     Base.metadata,
-    Column("project_id", ForeignKey("projects.id")),
-    Column("user_id", ForeignKey("users.id"))
+    Column("project_id", ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", ForeignKey("users.id"), primary_key=True),
+    Index("ix_project_members_user_id", "user_id"),
 )
 
 class Project(Base):
@@ -17,6 +18,15 @@ class Project(Base):
     description = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped by every write to the project, its tasks or their comments; drives ETags
+    data_version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Incremented only by edits to the project row itself; conditional writes match on it (If-Match)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Set when the owner deletes the project; reads treat it as gone and a job purges its rows
+    deleted_at = Column(DateTime, nullable=True)
     
     owner = relationship("User",backref="projects")
-    members = relationship("User", secondary=project_members, backref="joined_projects")
\ No newline at end of file
+    members = relationship("User", secondary=project_members, backref="joined_projects", passive_deletes=True)
+
+    # The owned half of accessible_project_ids; the member half uses ix_project_members_user_id
+    __table_args__ = (Index("ix_projects_owner_id_id", "owner_id", "id"),)
\ No newline at end of file
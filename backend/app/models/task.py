@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Enum, Index
+from sqlalchemy.orm import relationship, backref
 from app.database import Base
 import enum
 
@@ -21,9 +21,24 @@ class Task(Base):
     description = Column(String, nullable=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.to_do)
     priority = Column(Enum(TaskPriority), default=TaskPriority.medium)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Denormalized for board cards: bumped by comment inserts, so listing tasks never counts comments
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime(timezone=True), default=func.now())
+    # Incremented by every update; conditional writes match on it (If-Match)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
-    project = relationship("Project", backref="tasks")
+    # passive_deletes: the database cascades, the ORM never loads children just to delete them
+    project = relationship("Project", backref=backref("tasks", passive_deletes=True))
     assignee = relationship("User")
+
+    # Match list_tasks: project scope, optional filter, keyset order on id
+    __table_args__ = (
+        Index("ix_tasks_project_id_id", "project_id", "id"),
+        Index("ix_tasks_project_id_status_id", "project_id", "status", "id"),
+        Index("ix_tasks_project_id_priority_id", "project_id", "priority", "id"),
+        Index("ix_tasks_project_id_assignee_id_id", "project_id", "assignee_id", "id"),
+        Index("ix_tasks_assignee_id", "assignee_id"),
+    )
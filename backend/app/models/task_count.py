@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.database import Base
+
+class ProjectTaskCount(Base):
+    """Per-project task counters, kept current by every task write path.
+
+    ``dimension`` is "status", "priority" or "assignee"; ``value`` is the enum
+    name (e.g. "in_progress") or the assignee id, "none" when unassigned.
+    """
+    __tablename__ = "project_task_counts"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    dimension = Column(String(16), primary_key=True)
+    value = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,39 +1,40 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserLogin
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_and_update_password_async
+from app.core.tokens import create_access_token
+from app.core.query_budget import query_budget
 
 router = APIRouter(tags=["Auth"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-@router.post("/signup",response_model=UserOut)
-def signup(user:UserCreate, db: Session = Depends(get_db)):
-    existingUser = db.query(User).filter(User.email == user.email).first()
+@router.post("/signup",response_model=UserOut, dependencies=[Depends(query_budget(3))])
+async def signup(user:UserCreate, db: AsyncSession = Depends(get_db)):
+    existingUser = await db.scalar(select(User).where(User.email == user.email))
     if(existingUser):
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
     new_user = User(name=user.name, email=user.email, password=hashed_pw)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
-@router.post("/login")
-def login(form_data:UserLogin, db:Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.email).first()
+@router.post("/login", dependencies=[Depends(query_budget(2))])
+async def login(form_data:UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.email))
     if not user:
         raise HTTPException(status_code=400, detail="Invalid Credentials")
-    if not verify_password(form_data.password, user.password):
+    valid, new_hash = await verify_and_update_password_async(form_data.password, user.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid Credentials")
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the plaintext
+        user.password = new_hash
+        await db.commit()
     token = create_access_token({"user_id":user.id, "email":user.email})
     return {"access_token":token, "token_type":"bearer"}
\ No newline at end of file
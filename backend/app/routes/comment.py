@@ -1,39 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
 from app.models.comment import Comment
 from app.models.task import Task
-from app.core.security import get_current_user
+from app.models.project import Project
+from app.core.security import get_current_user, Principal
+from app.core.access import require_access
+from app.core.replicas import get_read_db
+from app.core.activity import record, excerpt
 from app.schemas.comment import CommentCreate, CommentOut
-from typing import List
+from app.core.pagination import Page, paginate, stream_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.query_budget import query_budget
+from app.core.responses import select_fields
+from app.core.cache import make_etag, cached_response, store_response, bump_project_versions
+from app.core.events import publish
 
 router = APIRouter(tags=["Comments"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-
-@router.post("/task/{task_id}", response_model=CommentOut)
-def add_comment(task_id: int, comment: CommentCreate, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+@router.post("/task/{task_id}", response_model=CommentOut, dependencies=[Depends(query_budget(7))])
+async def add_comment(task_id: int, comment: CommentCreate, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    project_id = await db.scalar(
+        select(Task.project_id)
+        .join(Project, Project.id == Task.project_id)
+        .where(Task.id == task_id, Project.deleted_at.is_(None))
+    )
+    if project_id is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    
+    await require_access(db, user.user_id, project_id, "comment on this task")
+
     new_comment = Comment(
         content=comment.content,
         task_id=task_id,
-        user_id=user["user_id"]
+        user_id=user.user_id
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    await db.flush()
+    await db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(comment_count=Task.comment_count + 1, last_activity_at=func.now()),
+        execution_options={"synchronize_session": False},
+    )
+    record(
+        db, project_id, "comment.created", user.user_id, task_id,
+        comment_id=new_comment.id, excerpt=excerpt(new_comment.content),
+    )
+    await bump_project_versions(db, [project_id])
+    await db.commit()
+    await db.refresh(new_comment)
+    await publish(
+        project_id, "comment.created", task_id=task_id,
+        data=CommentOut.model_validate(new_comment).model_dump(mode="json"),
+    )
     return new_comment
 
-@router.get("/task/{task_id}", response_model=List[CommentOut])
-def get_comments(task_id: int, db: Session = Depends(get_db)):
-    comments = db.query(Comment).filter(Comment.task_id == task_id).all()
-    return comments
\ No newline at end of file
+@router.get("/task/{task_id}", response_model=Page[CommentOut], dependencies=[Depends(query_budget(3))])
+async def get_comments(
+    task_id: int,
+    request: Request,
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_user)
+):
+    project = (await db.execute(
+        select(Project.id, Project.data_version)
+        .join(Task, Task.project_id == Project.id)
+        .where(Task.id == task_id, Project.deleted_at.is_(None))
+    )).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await require_access(db, user.user_id, project.id, "view comments")
+    stmt = select_fields(Comment, CommentOut).where(Comment.task_id == task_id)
+    if stream:
+        return stream_ndjson(stmt, Comment, CommentOut, replica=db.info["replica"])
+    etag = make_etag("comments", task_id, project.data_version, request.url.query)
+    cached = await cached_response(request, etag, "get_comments")
+    if cached is not None:
+        return cached
+    return await store_response(etag, Page[CommentOut], await paginate(db, stmt, Comment, cursor, limit))
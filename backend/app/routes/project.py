@@ -1,78 +1,335 @@
 # app/routes/project.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models.project import Project
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, func, delete, update
+from starlette.concurrency import run_in_threadpool
+from typing import Literal
+from datetime import datetime
+import itertools
+import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, open_session, upsert
+from app.models.project import Project, project_members
 from app.models.user import User
-from app.schemas.project import ProjectCreate, ProjectOut
-from app.core.security import get_current_user
+from app.models.task import Task
+from app.models.comment import Comment
+from app.models.task_count import ProjectTaskCount
+from app.models.activity import Activity
+from app.schemas.project import ProjectCreate, ProjectOut, ProjectSummary, ProjectImportResult
+from app.schemas.activity import ActivityOut
+from app.core.security import get_current_user, get_stream_user, Principal
+from app.core.access import accessible_project_ids, require_access
+from app.core.replicas import get_read_db
+from app.core.activity import record
+from app.core.pagination import Page, paginate, stream_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.task_counts import load_summaries
+from app.core.query_budget import query_budget
+from app.core.responses import select_fields
+from app.core.cache import (
+    make_etag, cached_response, store_response, bump_project_versions, if_match_versions, raise_conflict, version_etag,
+)
+from app.core.events import broker, event_stream_response, publish
+from app.core.jobs import enqueue, job_handler
+from app.core.transfer import InvalidImport, export_response, import_records, read_records
 
 router = APIRouter(tags=["Projects"])
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# "async" (default): hide the project at once and purge its rows in a background job.
+# "inline": purge within the request and answer once the rows are gone.
+PROJECT_DELETE_MODE = os.getenv("PROJECT_DELETE_MODE", "async")
+# Tasks (with their comments) removed per purge transaction; bounds lock time and memory
+PROJECT_PURGE_CHUNK = int(os.getenv("PROJECT_PURGE_CHUNK", 1000))
 
-@router.post("/", response_model=ProjectOut)
-def create_project(project: ProjectCreate, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    new_project = Project(title=project.title, description=project.description, owner_id=user["user_id"])
+@router.post("/", response_model=ProjectOut, dependencies=[Depends(query_budget(2))])
+async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    new_project = Project(title=project.title, description=project.description, owner_id=user.user_id)
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
     return new_project
 
-@router.get("/", response_model=list[ProjectOut])
-def list_projects(db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    projects = db.query(Project).all()
-    return projects
+@router.get("/", response_model=Page[ProjectOut], dependencies=[Depends(query_budget(2))])
+async def list_projects(
+    request: Request,
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_user)
+):
+    """Projects the caller owns or is a member of."""
+    accessible = Project.id.in_(accessible_project_ids(user.user_id))
+    stmt = select_fields(Project, ProjectOut).where(accessible)
+    if stream:
+        return stream_ndjson(stmt, Project, ProjectOut, replica=db.info["replica"])
+    # Creates raise max(id), deletes lower the count, every other write (adding a member too) bumps a data_version
+    count, max_id, versions = (await db.execute(
+        select(func.count(Project.id), func.max(Project.id), func.coalesce(func.sum(Project.data_version), 0))
+        .where(accessible)
+    )).one()
+    etag = make_etag("projects", user.user_id, count, max_id, versions, request.url.query)
+    cached = await cached_response(request, etag, "list_projects")
+    if cached is not None:
+        return cached
+    return await store_response(etag, Page[ProjectOut], await paginate(db, stmt, Project, cursor, limit))
+
+@router.post("/import", response_model=ProjectImportResult)
+async def import_project(
+    file: UploadFile = File(...),
+    title: str | None = Form(None),
+    format: Literal["jsonl", "csv"] | None = Query(None, description="Defaults to csv for .csv uploads, else jsonl"),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """Create a project from a file in the export format (see app/core/transfer.py).
+
+    The multipart parser spools the upload to disk and it is read back in
+    batches, so memory does not grow with the file. An invalid row rejects
+    the import with 422, and the partly imported project is discarded.
+    """
+    format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "jsonl")
+    records = read_records(file.file, format)
+    try:
+        first = await run_in_threadpool(next, records, None)
+    except InvalidImport as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    header = first if first is not None and first.get("record") == "project" else {}
+    if first is not None:
+        # Put it back so import_records numbers rows from the top of the file
+        records = itertools.chain([first], records)
+    fallback_title = os.path.splitext(file.filename or "")[0] or "Imported project"
+    details = ProjectCreate(title=title or header.get("title") or fallback_title, description=header.get("description"))
+
+    project = Project(title=details.title, description=details.description, owner_id=user.user_id)
+    db.add(project)
+    await db.commit()
+    try:
+        counts = await import_records(db, project.id, user.user_id, records)
+    except InvalidImport as e:
+        await db.rollback()
+        await soft_delete_project(db, project.id)
+        await enqueue(db, "project.delete", {"project_id": project.id}, idempotency_key=f"project.delete:{project.id}")
+        await db.commit()
+        raise HTTPException(status_code=422, detail=e.errors)
+    record(db, project.id, "project.imported", user.user_id, **counts)
+    await bump_project_versions(db, [project.id])
+    await db.commit()
+    return {"project": project, **counts}
 
-@router.get("/{project_id}", response_model=ProjectOut)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+@router.get("/summaries", response_model=list[ProjectSummary], dependencies=[Depends(query_budget(2))])
+async def list_project_summaries(db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    """Task counts for all of the caller's projects in two queries, without touching tasks."""
+    project_ids = (await db.scalars(accessible_project_ids(user.user_id))).all()
+    summaries = await load_summaries(db, project_ids)
+    return list(summaries.values())
+
+@router.get("/{project_id}", response_model=ProjectOut, dependencies=[Depends(query_budget(2))])
+async def get_project(project_id: int, request: Request, db: AsyncSession = Depends(get_read_db), user: Principal = Depends(get_current_user)):
+    project = await db.get(Project, project_id)
+    if not project or project.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    await require_access(db, user.user_id, project_id, "view this project")
+    etag = make_etag("project", project.id, project.data_version)
+    cached = await cached_response(request, etag, "get_project")
+    if cached is not None:
+        return cached
+    return await store_response(etag, ProjectOut, project)
 
-@router.put("/{project_id}", response_model=ProjectOut)
-def update_project(project_id: int, updated: ProjectCreate, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+@router.get("/{project_id}/summary", response_model=ProjectSummary, dependencies=[Depends(query_budget(3))])
+async def get_project_summary(project_id: int, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    project = await db.get(Project, project_id)
+    if not project or project.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Project not found")
-    if project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    project.title = updated.title
-    project.description = updated.description
-    db.commit()
-    db.refresh(project)
+    await require_access(db, user.user_id, project_id)
+    summaries = await load_summaries(db, [project_id])
+    return summaries[project_id]
+
+@router.get("/{project_id}/activity", response_model=Page[ActivityOut], dependencies=[Depends(query_budget(3))])
+async def list_activity(
+    project_id: int,
+    request: Request,
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """What happened in the project, newest first."""
+    data_version = await db.scalar(
+        select(Project.data_version).where(Project.id == project_id, Project.deleted_at.is_(None))
+    )
+    if data_version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    await require_access(db, user.user_id, project_id, "view this project")
+    # Every recorded change also bumps data_version, so it versions the feed too
+    etag = make_etag("activity", project_id, data_version, request.url.query)
+    cached = await cached_response(request, etag, "list_activity")
+    if cached is not None:
+        return cached
+    stmt = select_fields(Activity, ActivityOut).where(Activity.project_id == project_id)
+    page = await paginate(db, stmt, Activity, cursor, limit, descending=True)
+    return await store_response(etag, Page[ActivityOut], page)
+
+@router.get("/{project_id}/export", dependencies=[Depends(query_budget(4))])
+async def export_project(
+    project_id: int,
+    format: Literal["jsonl", "csv"] = Query("jsonl"),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """The project, its tasks and their comments, streamed from server-side cursors."""
+    project = await db.get(Project, project_id)
+    if not project or project.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    await require_access(db, user.user_id, project_id)
+    return export_response(project, format)
+
+@router.get("/{project_id}/events", dependencies=[Depends(query_budget(2))])
+async def project_events(project_id: int, user: Principal = Depends(get_stream_user)):
+    """Server-Sent Events for changes to this project, its tasks and their comments.
+
+    The access check uses its own short-lived session so that no pooled
+    connection is held for the life of the stream.
+    """
+    db = open_session()
+    try:
+        exists = await db.scalar(select(Project.id).where(Project.id == project_id, Project.deleted_at.is_(None)))
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        await require_access(db, user.user_id, project_id)
+    finally:
+        await db.close()
+    await broker.start()
+    return event_stream_response(project_id)
+
+@router.put("/{project_id}", response_model=ProjectOut, dependencies=[Depends(query_budget(2))])
+async def update_project(
+    project_id: int,
+    updated: ProjectCreate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """Edit the title and description. Send ``version`` in ``If-Match`` to get 409 instead of overwriting a newer edit.
+
+    A single ``UPDATE ... RETURNING`` checks existence, ownership and version
+    and writes. Only when it matches nothing is the reason looked up.
+    """
+    conditions = [Project.id == project_id, Project.owner_id == user.user_id, Project.deleted_at.is_(None)]
+    versions = if_match_versions(request)
+    if versions is not None:
+        conditions.append(Project.version.in_(versions))
+    project = await db.scalar(
+        update(Project)
+        .where(*conditions)
+        .values(
+            title=updated.title, description=updated.description,
+            version=Project.version + 1, data_version=Project.data_version + 1,
+        )
+        .returning(Project),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    if project is None:
+        current = (await db.execute(
+            select(Project.owner_id, Project.version).where(Project.id == project_id, Project.deleted_at.is_(None))
+        )).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if current.owner_id != user.user_id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        raise_conflict(current.version, "Project")
+    record(db, project_id, "project.updated", user.user_id, title=updated.title)
+    await db.commit()
+    response.headers["ETag"] = version_etag(project.version)
+    await publish(project.id, "project.updated", data=ProjectOut.model_validate(project).model_dump(mode="json"))
     return project
 
-@router.delete("/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+@router.delete("/{project_id}", status_code=202)
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    """Soft-delete the project, then purge its rows in a job (or inline, see PROJECT_DELETE_MODE).
+
+    Every read treats the project as gone once ``deleted_at`` is set, so boards
+    hear ``project.deleted`` straight away.
+    """
+    owner_id = await db.scalar(select(Project.owner_id).where(Project.id == project_id, Project.deleted_at.is_(None)))
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    if project.owner_id != user["user_id"]:
+    if owner_id != user.user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
-    db.delete(project)
-    db.commit()
-    return {"detail": "Project deleted successfully"}
-
-@router.post("/{project_id}/add-member/{user_id}")
-def add_member(project_id: int, user_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    await soft_delete_project(db, project_id)
+    if PROJECT_DELETE_MODE == "inline":
+        await db.commit()
+        await publish(project_id, "project.deleted")
+        await purge_project(db, project_id)
+        return JSONResponse({"detail": "Project deleted successfully"})
+    await enqueue(db, "project.delete", {"project_id": project_id}, idempotency_key=f"project.delete:{project_id}")
+    await db.commit()
+    await publish(project_id, "project.deleted")
+    return {"detail": "Project deletion scheduled"}
+
+async def soft_delete_project(db: AsyncSession, project_id: int):
+    await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(deleted_at=datetime.utcnow(), data_version=Project.data_version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+async def purge_project(db: AsyncSession, project_id: int):
+    """Delete a soft-deleted project's rows in chunks, each in its own short transaction.
+
+    Set-based deletes, children first: the ORM would load every task and comment to
+    cascade, and one big DELETE would hold its locks until 100k rows were gone.
+    """
+    options = {"synchronize_session": False}
+    while True:
+        task_ids = (await db.scalars(
+            select(Task.id).where(Task.project_id == project_id).order_by(Task.id).limit(PROJECT_PURGE_CHUNK)
+        )).all()
+        if not task_ids:
+            break
+        await db.execute(delete(Comment).where(Comment.task_id.in_(task_ids)), execution_options=options)
+        await db.execute(delete(Task).where(Task.id.in_(task_ids)), execution_options=options)
+        await db.commit()
+    while True:
+        activity_ids = (await db.scalars(
+            select(Activity.id).where(Activity.project_id == project_id).order_by(Activity.id).limit(PROJECT_PURGE_CHUNK)
+        )).all()
+        if not activity_ids:
+            break
+        await db.execute(delete(Activity).where(Activity.id.in_(activity_ids)), execution_options=options)
+        await db.commit()
+    await db.execute(delete(ProjectTaskCount).where(ProjectTaskCount.project_id == project_id), execution_options=options)
+    await db.execute(delete(project_members).where(project_members.c.project_id == project_id))
+    await db.execute(
+        delete(Project).where(Project.id == project_id, Project.deleted_at.is_not(None)), execution_options=options
+    )
+    await db.commit()
+
+@job_handler("project.delete")
+async def purge_project_job(db: AsyncSession, payload: dict):
+    await purge_project(db, payload["project_id"])
+
+@router.post("/{project_id}/add-member/{user_id}", dependencies=[Depends(query_budget(5))])
+async def add_member(project_id: int, user_id: int, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    owner_id = await db.scalar(select(Project.owner_id).where(Project.id == project_id, Project.deleted_at.is_(None)))
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    if project.owner_id != user["user_id"]:
+    if owner_id != user.user_id:
         raise HTTPException(status_code=403, detail="Only owner can add members")
 
-    member = db.query(User).filter(User.id == user_id).first()
-    if not member:
+    member_name = await db.scalar(select(User.name).where(User.id == user_id))
+    if member_name is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    project.members.append(member)
-    db.commit()
-    return {"detail": f"{member.name} added as member"}
+    # Insert the membership row directly instead of loading project.members; re-adding is a no-op
+    await db.execute(
+        upsert(project_members)
+        .values(project_id=project_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["project_id", "user_id"])
+    )
+    record(db, project_id, "member.added", user.user_id, member_id=user_id, name=member_name)
+    await bump_project_versions(db, [project_id])
+    await db.commit()
+    await publish(project_id, "member.added", user_id=user_id)
+    return {"detail": f"{member_name} added as member"}
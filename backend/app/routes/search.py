@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.schemas.search import SearchHit
+from app.core.security import get_current_user, Principal
+from app.core.pagination import Page, encode_offset_cursor, decode_offset_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.search import search_statement, search_terms
+from app.core.query_budget import query_budget
+from app.core.responses import typed_response
+
+router = APIRouter(tags=["Search"])
+
+@router.get("", response_model=Page[SearchHit], dependencies=[Depends(query_budget(1))])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """Tasks and comments matching every word of ``q`` (as prefixes), best match first."""
+    terms = search_terms(q)
+    if not terms:
+        return typed_response(Page[SearchHit], {"items": [], "next_cursor": None})
+    offset = decode_offset_cursor(cursor)
+    rows = (await db.execute(search_statement(user.user_id, terms, offset, limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_offset_cursor(offset + limit)
+    return typed_response(Page[SearchHit], {"items": rows, "next_cursor": next_cursor})
@@ -1,29 +1,95 @@
 # app/routes/task.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, insert, update, delete, func, case, literal, and_, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
 from app.models.task import Task,TaskStatus, TaskPriority
-from app.schemas.task import TaskCreate, TaskOut
-from app.core.security import get_current_user
+from app.models.project import Project
+from app.models.comment import Comment
+from app.schemas.task import TaskCreate, TaskOut, TaskBatchRequest, TaskBatchResponse
+from app.core.security import get_current_user, Principal
+from app.core.access import accessible_projects, require_access
+from app.core.replicas import get_read_db
+from app.core.activity import record, record_many
+from app.core.pagination import Page, paginate, stream_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.task_counts import TaskCountDeltas
+from app.core.query_budget import query_budget
+from app.core.responses import select_fields
+from app.core.cache import (
+    make_etag, cached_response, store_response, bump_project_versions, check_if_match, if_match_versions, raise_conflict,
+    version_etag,
+)
+from app.core.events import publish
 
 router = APIRouter(tags=["Tasks"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.post("/project/{project_id}", response_model=TaskOut)
-def create_task(project_id: int, task: TaskCreate, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    from app.models.project import Project
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+CONFLICT = "Task was changed by someone else; reload it and try again"
+
+async def publish_task(task: Task, type: str):
+    await publish(task.project_id, type, id=task.id, data=TaskOut.model_validate(task).model_dump(mode="json"))
+
+def activity_entry(project_id: int, task_id: int, user: Principal, kind: str, title: str, status) -> dict:
+    data = {"title": title, "status": TaskStatus(status).value if status else None}
+    return {"project_id": project_id, "task_id": task_id, "user_id": user.user_id, "kind": kind, "data": data}
+
+def record_task(db: AsyncSession, task: Task, user: Principal, kind: str):
+    entry = activity_entry(task.project_id, task.id, user, kind, task.title, task.status)
+    record(db, entry["project_id"], kind, user.user_id, task.id, **entry["data"])
+
+def by_task_id(column, values: dict):
+    """``CASE tasks.id WHEN <id> THEN <value> ... ELSE <column> END``: a different value per row in one UPDATE."""
+    return case(
+        {task_id: literal(value, column.type) for task_id, value in values.items()}, value=Task.id, else_=column
+    )
+
+def as_read(current: dict, task_ids):
+    """Matches each task only as the snapshot ``current`` shows it: at that version, in that project,
+    and while the project is not deleted."""
+    return and_(
+        Task.version == case({task_id: current[task_id].version for task_id in task_ids}, value=Task.id),
+        Task.project_id == case({task_id: current[task_id].project_id for task_id in task_ids}, value=Task.id),
+        exists().where(Project.id == Task.project_id, Project.deleted_at.is_(None)),
+    )
+
+async def get_member_task(db: AsyncSession, task_id: int, user: Principal, action: str, lock: bool = False) -> Task:
+    """The task, if its project is live and the user owns or is a member of it.
+
+    With ``lock`` the task's row stays locked until commit (Postgres), so it cannot change before it is written.
+    """
+    stmt = select(Task).join(Project, Project.id == Task.project_id).where(Task.id == task_id, Project.deleted_at.is_(None))
+    if lock:
+        stmt = stmt.with_for_update(of=Task)
+    task = await db.scalar(stmt)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await require_access(db, user.user_id, task.project_id, f"{action} task")
+    return task
+
+async def write_task(db: AsyncSession, request: Request, task: Task, **values):
+    """Apply ``values`` with one ``UPDATE ... RETURNING``, refreshing ``task`` in place.
+
+    ``task`` was read with ``lock``. With ``If-Match`` the update also requires
+    the version that was read, so a write that slipped in anyway (SQLite takes
+    no row locks) is a 409 rather than a lost update. Without it the last
+    write wins, as before versions existed.
+    """
+    stmt = update(Task).where(Task.id == task.id)
+    if if_match_versions(request) is not None:
+        stmt = stmt.where(Task.version == task.version)
+    written = await db.scalar(
+        stmt.values(**values, version=Task.version + 1, last_activity_at=func.now()).returning(Task),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    if written is None:
+        raise_conflict(await db.scalar(select(Task.version).where(Task.id == task.id)), "Task")
+
+@router.post("/project/{project_id}", response_model=TaskOut, dependencies=[Depends(query_budget(7))])
+async def create_task(project_id: int, task: TaskCreate, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    project = await db.get(Project, project_id)
+    if not project or project.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to add tasks")
+    await require_access(db, user.user_id, project_id, "add tasks")
 
     new_task = Task(
         title=task.title,
@@ -34,108 +100,297 @@ def create_task(project_id: int, task: TaskCreate, db: Session = Depends(get_db)
         assignee_id=task.assignee_id
     )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    # The insert happens here instead of at commit, so the activity entry can carry the id
+    await db.flush()
+    record_task(db, new_task, user, "task.created")
+    counts = TaskCountDeltas()
+    counts.add(new_task)
+    await counts.apply(db)
+    await bump_project_versions(db, [project_id])
+    await db.commit()
+    await db.refresh(new_task)
+    await publish_task(new_task, "task.created")
     return new_task
 
-# This route will be replaced by the filtered version below
-
-@router.put("/{task_id}", response_model=TaskOut)
-def update_task(task_id: int, updated: TaskCreate, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    if task.project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update task")
+@router.put("/{task_id}", response_model=TaskOut, dependencies=[Depends(query_budget(6))])
+async def update_task(
+    task_id: int,
+    updated: TaskCreate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(get_current_user)
+):
+    """Replace the task's fields. Send its ``version`` in ``If-Match`` to get 409 instead of overwriting a newer edit."""
+    task = await get_member_task(db, task_id, user, "update", lock=True)
+    check_if_match(request, task.version, "Task")
 
-    task.title = updated.title
-    task.description = updated.description
-    task.status = updated.status
-    task.priority = updated.priority
-    task.assignee_id = updated.assignee_id
-    db.commit()
-    db.refresh(task)
+    counts = TaskCountDeltas()
+    counts.remove(task)
+    await write_task(
+        db, request, task, title=updated.title, description=updated.description, status=updated.status,
+        priority=updated.priority, assignee_id=updated.assignee_id,
+    )
+    counts.add(task)
+    await counts.apply(db)
+    record_task(db, task, user, "task.updated")
+    await bump_project_versions(db, [task.project_id])
+    await db.commit()
+    response.headers["ETag"] = version_etag(task.version)
+    await publish_task(task, "task.updated")
     return task
 
-@router.delete("/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if task.project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete task")
-    db.delete(task)
-    db.commit()
+@router.delete("/{task_id}", dependencies=[Depends(query_budget(7))])
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    task = await get_member_task(db, task_id, user, "delete")
+    counts = TaskCountDeltas()
+    counts.remove(task)
+    await counts.apply(db)
+    # Set-based deletes; the ORM would first load task.comments to orphan them
+    await db.execute(delete(Comment).where(Comment.task_id == task_id))
+    await db.execute(delete(Task).where(Task.id == task_id), execution_options={"synchronize_session": False})
+    record_task(db, task, user, "task.deleted")
+    await bump_project_versions(db, [task.project_id])
+    await db.commit()
+    await publish(task.project_id, "task.deleted", id=task_id)
     return {"detail": "Task deleted successfully"}
 
-from fastapi import Query
-
-@router.patch("/{task_id}/mark-done", response_model=TaskOut)
-def mark_task_as_done(task_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task.project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update task")
-    
-    task.status = TaskStatus.done
-    db.commit()
-    db.refresh(task)
+async def set_task_status(
+    db: AsyncSession, request: Request, response: Response, task_id: int, user: Principal, status: TaskStatus
+) -> Task:
+    task = await get_member_task(db, task_id, user, "update", lock=True)
+    check_if_match(request, task.version, "Task")
+    counts = TaskCountDeltas()
+    counts.remove(task)
+    await write_task(db, request, task, status=status)
+    counts.add(task)
+    await counts.apply(db)
+    record_task(db, task, user, "task.status_changed")
+    await bump_project_versions(db, [task.project_id])
+    await db.commit()
+    response.headers["ETag"] = version_etag(task.version)
+    await publish_task(task, "task.updated")
     return task
 
-@router.patch("/{task_id}/mark-in-progress", response_model=TaskOut)
-def mark_task_as_in_progress(task_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task.project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update task")
-    
-    task.status = TaskStatus.in_progress
-    db.commit()
-    db.refresh(task)
-    return task
+@router.patch("/{task_id}/mark-done", response_model=TaskOut, dependencies=[Depends(query_budget(6))])
+async def mark_task_as_done(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    return await set_task_status(db, request, response, task_id, user, TaskStatus.done)
 
-@router.patch("/{task_id}/mark-todo", response_model=TaskOut)
-def mark_task_as_todo(task_id: int, db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task.project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update task")
-    
-    task.status = TaskStatus.to_do
-    db.commit()
-    db.refresh(task)
-    return task
+@router.patch("/{task_id}/mark-in-progress", response_model=TaskOut, dependencies=[Depends(query_budget(6))])
+async def mark_task_as_in_progress(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    return await set_task_status(db, request, response, task_id, user, TaskStatus.in_progress)
+
+@router.patch("/{task_id}/mark-todo", response_model=TaskOut, dependencies=[Depends(query_budget(6))])
+async def mark_task_as_todo(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    return await set_task_status(db, request, response, task_id, user, TaskStatus.to_do)
 
-@router.get("/project/{project_id}", response_model=list[TaskOut])
-def list_tasks(
+@router.get("/project/{project_id}", response_model=Page[TaskOut], dependencies=[Depends(query_budget(3))])
+async def list_tasks(
     project_id: int,
+    request: Request,
     status: TaskStatus | None = Query(None),
     priority: TaskPriority | None = Query(None),
     assignee_id: int | None = Query(None),
-    db: Session = Depends(get_db),
-    user: dict = Depends(get_current_user)
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_user)
 ):
-    # Verify project ownership
-    from app.models.project import Project
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    # The version for the ETag doubles as the existence check
+    data_version = await db.scalar(
+        select(Project.data_version).where(Project.id == project_id, Project.deleted_at.is_(None))
+    )
+    if data_version is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    if project.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to view tasks")
-    
-    query = db.query(Task).filter(Task.project_id == project_id)
+    await require_access(db, user.user_id, project_id)
+
+    stmt = select_fields(Task, TaskOut).where(Task.project_id == project_id)
     if status:
-        query = query.filter(Task.status == status)
+        stmt = stmt.where(Task.status == status)
     if priority:
-        query = query.filter(Task.priority == priority)
+        stmt = stmt.where(Task.priority == priority)
     if assignee_id:
-        query = query.filter(Task.assignee_id == assignee_id)
-    return query.all()
+        stmt = stmt.where(Task.assignee_id == assignee_id)
+    if stream:
+        return stream_ndjson(stmt, Task, TaskOut, replica=db.info["replica"])
+    etag = make_etag("tasks", project_id, data_version, request.url.query)
+    cached = await cached_response(request, etag, "list_tasks")
+    if cached is not None:
+        return cached
+    return await store_response(etag, Page[TaskOut], await paginate(db, stmt, Task, cursor, limit))
+
+@router.post("/batch", response_model=TaskBatchResponse, dependencies=[Depends(query_budget(11))])
+async def batch_tasks(batch: TaskBatchRequest, db: AsyncSession = Depends(get_db), user: Principal = Depends(get_current_user)):
+    """Apply many create/update/set_status/delete operations in one transaction.
+
+    Ownership is checked once per distinct project, each kind of operation is
+    applied as a bulk statement, and every item gets its own result. Items that
+    fail validation (404/403/409) are reported and skipped; the rest commit.
+    """
+    ops = batch.operations
+    results = [None] * len(ops)
+
+    task_ids = {op.task_id for op in ops if op.op != "create"}
+    current = {}
+    if task_ids:
+        rows = await db.execute(
+            select(Task.id, Task.project_id, Task.title, Task.status, Task.priority, Task.assignee_id, Task.version)
+            .where(Task.id.in_(task_ids))
+        )
+        current = {row.id: row for row in rows.all()}
+    task_projects = {task_id: row.project_id for task_id, row in current.items()}
+
+    project_ids = set(task_projects.values()) | {op.project_id for op in ops if op.op == "create"}
+    live, allowed = set(), frozenset()
+    if project_ids:
+        live = set((await db.scalars(
+            select(Project.id).where(Project.id.in_(project_ids), Project.deleted_at.is_(None))
+        )).all())
+        allowed = await accessible_projects(db, user.user_id, live)
+
+    creates, writes, deletes = [], [], []
+    seen = set()
+    for index, op in enumerate(ops):
+        if op.op == "create":
+            project_id = op.project_id
+            if project_id not in live:
+                results[index] = (404, "Project not found")
+                continue
+        else:
+            if op.task_id not in task_projects:
+                results[index] = (404, "Task not found")
+                continue
+            if op.task_id in seen:
+                results[index] = (409, "Task appears more than once in the batch")
+                continue
+            seen.add(op.task_id)
+            project_id = task_projects[op.task_id]
+            if project_id not in live:
+                results[index] = (404, "Task not found")
+                continue
+        if project_id not in allowed:
+            results[index] = (403, f"Not authorized to {op.op.replace('_', ' ')} task")
+            continue
+        if op.version is not None and op.op != "create" and current[op.task_id].version != op.version:
+            results[index] = (409, CONFLICT)
+            continue
+
+        if op.op == "create":
+            creates.append((index, {**op.task.model_dump(), "project_id": project_id}))
+        elif op.op == "update":
+            writes.append((index, op.task_id, "task.updated", op.task.model_dump()))
+        elif op.op == "set_status":
+            writes.append((index, op.task_id, "task.status_changed", {"status": op.status}))
+        else:
+            deletes.append((index, op.task_id))
+
+    created = {}
+    if creates:
+        # One multi-row INSERT; ids are assigned in VALUES order, so sorting the
+        # returned rows by id lines them up with the create items
+        new_tasks = await db.scalars(
+            insert(Task).values([values for _, values in creates]).returning(Task),
+            execution_options={"synchronize_session": False},
+        )
+        created = {
+            index: task for (index, _), task in zip(creates, sorted(new_tasks.all(), key=lambda task: task.id))
+        }
+
+    # Updates and status changes in one statement, each row only as read above: a task
+    # written since then, or whose project was deleted, is not returned and its item fails
+    changed = {}
+    if writes:
+        columns = {}
+        for _, task_id, _, values in writes:
+            for field, value in values.items():
+                columns.setdefault(field, {})[task_id] = value
+        ids = [task_id for _, task_id, _, _ in writes]
+        rows = await db.scalars(
+            update(Task)
+            .where(Task.id.in_(ids), as_read(current, ids))
+            .values(
+                **{field: by_task_id(getattr(Task, field), values) for field, values in columns.items()},
+                version=Task.version + 1,
+                last_activity_at=func.now(),
+            )
+            .returning(Task),
+            execution_options={"synchronize_session": False},
+        )
+        changed = {task.id: task for task in rows.all()}
+    deleted = set()
+    if deletes:
+        ids = [task_id for _, task_id in deletes]
+        deleted = set((await db.scalars(
+            delete(Task).where(Task.id.in_(ids), as_read(current, ids)).returning(Task.id),
+            execution_options={"synchronize_session": False},
+        )).all())
+        if deleted:
+            # The foreign key cascades on Postgres; SQLite does not enforce it
+            await db.execute(delete(Comment).where(Comment.task_id.in_(deleted)))
+    missed = [(index, task_id) for index, task_id, _, _ in writes if task_id not in changed]
+    missed += [(index, task_id) for index, task_id in deletes if task_id not in deleted]
+    if missed:
+        still_live = set((await db.scalars(
+            select(Project.id).where(
+                Project.id.in_({current[task_id].project_id for _, task_id in missed}), Project.deleted_at.is_(None)
+            )
+        )).all())
+        for index, task_id in missed:
+            results[index] = (409, CONFLICT) if current[task_id].project_id in still_live else (404, "Task not found")
+    writes = [write for write in writes if write[1] in changed]
+    deletes = [(index, task_id) for index, task_id in deletes if task_id in deleted]
+
+    # The snapshot is what each written row held, since only that version matched
+    counts = TaskCountDeltas()
+    for task in created.values():
+        counts.add(task)
+    for _, task_id, _, _ in writes:
+        old = current[task_id]
+        counts.remove_values(old.project_id, old.status, old.priority, old.assignee_id)
+        counts.add(changed[task_id])
+    for _, task_id in deletes:
+        old = current[task_id]
+        counts.remove_values(old.project_id, old.status, old.priority, old.assignee_id)
+    await counts.apply(db)
+
+    entries = [
+        activity_entry(task.project_id, task.id, user, "task.created", task.title, task.status)
+        for task in created.values()
+    ]
+    entries += [
+        activity_entry(changed[task_id].project_id, task_id, user, kind, changed[task_id].title, changed[task_id].status)
+        for _, task_id, kind, _ in writes
+    ]
+    entries += [
+        activity_entry(current[task_id].project_id, task_id, user, "task.deleted", current[task_id].title, current[task_id].status)
+        for _, task_id in deletes
+    ]
+    await record_many(db, entries)
+
+    touched = {task.project_id for task in list(created.values()) + list(changed.values())}
+    touched |= {current[task_id].project_id for _, task_id in deletes}
+    await bump_project_versions(db, touched)
+    await db.commit()
+
+    # One event per project rather than per task; boards refetch the listed ids
+    touched_tasks = {}
+    for task in list(created.values()) + list(changed.values()):
+        touched_tasks.setdefault(task.project_id, []).append(task.id)
+    for _, task_id in deletes:
+        touched_tasks.setdefault(current[task_id].project_id, []).append(task_id)
+    for project_id, ids in touched_tasks.items():
+        await publish(project_id, "tasks.changed", ids=ids)
+
+    response = []
+    for index, op in enumerate(ops):
+        if results[index] is not None:
+            status_code, detail = results[index]
+            response.append({"index": index, "op": op.op, "status_code": status_code, "detail": detail})
+        elif op.op == "create":
+            response.append({"index": index, "op": op.op, "status_code": 201, "task": created[index]})
+        elif op.op == "delete":
+            response.append({"index": index, "op": op.op, "status_code": 200, "detail": "Task deleted successfully"})
+        else:
+            response.append({"index": index, "op": op.op, "status_code": 200, "task": changed[op.task_id]})
+    return {"results": response}
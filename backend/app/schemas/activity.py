@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class ActivityOut(BaseModel):
+    id: int
+    project_id: int
+    task_id: Optional[int] = None
+    user_id: Optional[int] = None
+    kind: str
+    data: dict
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -5,6 +5,12 @@ from datetime import datetime
 class CommentCreate(BaseModel):
     content: str
 
+class CommentImport(CommentCreate):
+    # Ids as they appear in the imported file
+    task_id: int
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
 class CommentOut(BaseModel):
     id: int
     content: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 
 class ProjectCreate(BaseModel):
     title: str
@@ -10,6 +10,20 @@ class ProjectOut(BaseModel):
     title: str
     description: Optional[str] = None
     owner_id: int
+    # Send back in If-Match to update only this version
+    version: int = 1
 
     class Config:
         from_attributes = True
+
+class ProjectImportResult(BaseModel):
+    project: ProjectOut
+    tasks: int
+    comments: int
+
+class ProjectSummary(BaseModel):
+    project_id: int
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_assignee: Dict[str, int]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class SearchHit(BaseModel):
+    kind: Literal["task", "comment"]
+    id: int
+    task_id: int
+    project_id: int
+    title: str
+    snippet: Optional[str] = None
+    rank: float
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime
 from app.models.task import TaskStatus, TaskPriority
 
 class TaskCreate(BaseModel):
@@ -9,6 +10,10 @@ class TaskCreate(BaseModel):
     status: Optional[TaskStatus] = TaskStatus.to_do
     priority: Optional[TaskPriority] = TaskPriority.medium
 
+class TaskImport(TaskCreate):
+    # The task's id in the imported file; comments refer to it
+    id: Optional[int] = None
+
 class TaskOut(BaseModel):
     id: int
     title: str
@@ -17,6 +22,47 @@ class TaskOut(BaseModel):
     priority: TaskPriority
     project_id: int
     assignee_id: Optional[int]
+    comment_count: int = 0
+    last_activity_at: Optional[datetime] = None
+    # Send back in If-Match (or as a batch item's version) to update only this version
+    version: int = 1
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskBatchOperation(BaseModel):
+    """One item of a batch: ``create`` needs project_id + task, ``update`` needs
+    task_id + task, ``set_status`` needs task_id + status, ``delete`` needs task_id."""
+    op: Literal["create", "update", "set_status", "delete"]
+    task_id: Optional[int] = None
+    project_id: Optional[int] = None
+    task: Optional[TaskCreate] = None
+    status: Optional[TaskStatus] = None
+    # update/set_status/delete: skip the item with 409 unless the task is still at this version
+    version: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        required = {
+            "create": ("project_id", "task"),
+            "update": ("task_id", "task"),
+            "set_status": ("task_id", "status"),
+            "delete": ("task_id",),
+        }[self.op]
+        missing = [name for name in required if getattr(self, name) is None]
+        if missing:
+            raise ValueError(f"{self.op} requires {', '.join(missing)}")
+        return self
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskBatchOperation] = Field(min_length=1, max_length=500)
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    status_code: int
+    task: Optional[TaskOut] = None
+    detail: Optional[str] = None
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
@@ -0,0 +1,196 @@
+"""Production launcher: one server process per core, sized to the container.
+
+    python -m app.serve              # what the Dockerfile and render.yaml run
+    python -m app.serve --dry-run    # print the plan and exit
+
+WEB_CONCURRENCY sets the number of workers outright. Otherwise it is the
+smallest of:
+
+- the CPUs this process may use, counting cgroup quotas and CPU affinity, so
+  a container gets its limit rather than the host's core count;
+- memory (the cgroup limit, else physical memory) / WORKER_MEMORY_MB;
+- DB_MAX_CONNECTIONS / DB_MIN_CONNECTIONS_PER_WORKER, when DB_MAX_CONNECTIONS is set;
+- MAX_WORKERS, when set.
+
+The chosen count is exported as WEB_CONCURRENCY, and ``app.database`` splits
+DB_MAX_CONNECTIONS between the workers from it. PASSWORD_HASH_WORKERS
+defaults to the CPUs left per worker, so the bcrypt pools do not multiply
+past the core count.
+
+Workers run under gunicorn, which restarts any worker that dies, with uvicorn's
+worker class on uvloop and httptools. Where gunicorn is not installed (it
+does not run on Windows), uvicorn's own process manager is used instead.
+KEEP_ALIVE_SECONDS should exceed the load balancer's idle timeout; otherwise
+the server may close a connection just as the balancer reuses it, and the
+client gets a 502. On shutdown, workers stop accepting and finish in-flight
+requests for up to GRACEFUL_TIMEOUT_SECONDS; event streams are closed then.
+
+Several workers need shared state for some features: EVENT_BROKER=postgres
+for live updates, and optionally a ``redis://`` RATE_LIMIT,
+RESPONSE_CACHE and REPLICA_STICKY_STORE (see DEPLOYMENT.md).
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import math
+import os
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+# Resident memory to budget per worker, including its bcrypt process; about 135MB when measured idle
+WORKER_MEMORY_MB = int(os.getenv("WORKER_MEMORY_MB", 256))
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", 0))
+DB_MIN_CONNECTIONS_PER_WORKER = int(os.getenv("DB_MIN_CONNECTIONS_PER_WORKER", 4))
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", 65))
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", 30))
+# Restart a worker after this many requests (with up to 10% jitter), 0 never; gunicorn only
+MAX_REQUESTS_PER_WORKER = int(os.getenv("MAX_REQUESTS_PER_WORKER", 0))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+logger = logging.getLogger("app.serve")
+
+def _read(path: str):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def available_cpus() -> int:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    quota = None
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")  # cgroup v2: "<quota> <period>" or "max <period>"
+    if cpu_max and not cpu_max.startswith("max"):
+        limit, period = cpu_max.split()
+        quota = int(limit) / int(period)
+    else:
+        limit, period = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            quota = int(limit) / int(period)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+def available_memory_mb() -> int:
+    physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") if hasattr(os, "sysconf") else 0
+    limit = _read("/sys/fs/cgroup/memory.max") or _read("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    # cgroup v1 reports "no limit" as a number near 2**63
+    if limit and limit.isdigit() and (not physical or int(limit) < physical):
+        return int(limit) // 2**20
+    return physical // 2**20
+
+def plan() -> dict:
+    """Worker count and the settings exported to the workers, with the inputs that decided them."""
+    cpus = available_cpus()
+    memory_mb = available_memory_mb()
+    limits = {"cpus": cpus}
+    if memory_mb:
+        limits["memory"] = max(1, memory_mb // WORKER_MEMORY_MB)
+    db_max_connections = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+    if db_max_connections:
+        limits["db_connections"] = max(1, db_max_connections // DB_MIN_CONNECTIONS_PER_WORKER)
+    if MAX_WORKERS:
+        limits["max_workers"] = MAX_WORKERS
+    if os.getenv("WEB_CONCURRENCY"):
+        workers, decided_by = int(os.environ["WEB_CONCURRENCY"]), "WEB_CONCURRENCY"
+    else:
+        decided_by = min(limits, key=limits.get)
+        workers = limits[decided_by]
+    return {
+        "workers": workers,
+        "decided_by": decided_by,
+        "limits": limits,
+        "memory_mb": memory_mb,
+        "env": {
+            "WEB_CONCURRENCY": str(workers),
+            "PASSWORD_HASH_WORKERS": os.getenv("PASSWORD_HASH_WORKERS", str(max(1, min(cpus // workers, 4)))),
+        },
+    }
+
+def _event_loop() -> tuple:
+    loop = "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    return loop, http
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is not installed
+    UvicornWorker = None
+
+if UvicornWorker is not None:
+    class Worker(UvicornWorker):
+        _loop, _http = _event_loop()
+        # Stop waiting on open connections (event streams) shortly before gunicorn's hard kill
+        CONFIG_KWARGS = {"loop": _loop, "http": _http, "timeout_graceful_shutdown": max(1, GRACEFUL_TIMEOUT_SECONDS - 5)}
+
+def run_gunicorn(workers: int):
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": workers,
+                # gunicorn imports the worker class by name
+                "worker_class": "app.serve.Worker",
+                "keepalive": KEEP_ALIVE_SECONDS,
+                "graceful_timeout": GRACEFUL_TIMEOUT_SECONDS,
+                "max_requests": MAX_REQUESTS_PER_WORKER,
+                "max_requests_jitter": MAX_REQUESTS_PER_WORKER // 10,
+                "loglevel": LOG_LEVEL,
+                "accesslog": "-" if os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes") else None,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Server().run()
+
+def run_uvicorn(workers: int, loop: str, http: str):
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers if workers > 1 else None,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+        log_level=LOG_LEVEL,
+        access_log=os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes"),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="print the plan and exit")
+    parser.add_argument("--no-gunicorn", action="store_true", help="use uvicorn's process manager")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    settings = plan()
+    loop, http = _event_loop()
+    manager = "uvicorn" if args.no_gunicorn or UvicornWorker is None else "gunicorn"
+    settings.update(manager=manager, loop=loop, http=http)
+    if args.dry_run:
+        print(json.dumps(settings, indent=2))
+        return
+
+    # Before anything imports app.database: the workers read these at import
+    os.environ.update(settings["env"])
+    workers = settings["workers"]
+    logger.info("Starting %d workers (%s) on %s:%d; %s", workers, settings["decided_by"], HOST, PORT, settings["limits"])
+    if workers > 1 and os.getenv("EVENT_BROKER", "local") == "local":
+        logger.warning("EVENT_BROKER=local with %d workers: live updates only reach boards on the same worker", workers)
+    if manager == "gunicorn":
+        run_gunicorn(workers)
+    else:
+        run_uvicorn(workers, loop, http)
+
+if __name__ == "__main__":
+    main()
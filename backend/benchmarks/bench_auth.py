@@ -0,0 +1,39 @@
+"""Per-request authentication overhead: python-jose vs the direct HMAC path vs the token cache.
+
+    python -m benchmarks.bench_auth --iterations 20000
+
+No server or database is needed; this times the functions behind get_current_user.
+"""
+import argparse
+import json
+import timeit
+
+from app.core import tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = tokens.create_access_token({"user_id": 1, "email": "bench@example.com"})
+
+    def uncached():
+        tokens.token_cache.clear()
+        return tokens.authenticate_token(token)
+
+    candidates = {
+        "jose_decode (before)": lambda: tokens._decode_with_jose(token),
+        "hmac_decode": lambda: tokens.decode_access_token(token),
+        "authenticate_token, cache miss": uncached,
+        "authenticate_token, cache hit": lambda: tokens.authenticate_token(token),
+    }
+    tokens.authenticate_token(token)
+
+    results = {}
+    for name, fn in candidates.items():
+        seconds = min(timeit.repeat(fn, number=args.iterations, repeat=3))
+        results[name] = {"us_per_call": round(seconds / args.iterations * 1e6, 2)}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Requests/sec for the sync (threadpool) and async (asyncio driver) database modes.
+
+    python -m benchmarks.bench_db_modes --requests 2000 --concurrency 100
+
+Runs against a scratch SQLite database, or BENCH_DATABASE_URL when set (use a
+Postgres URL to exercise psycopg2 vs asyncpg).
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.common import drive, run_server, scratch_database, signup_and_login
+
+async def seed(base_url: str, tasks: int) -> tuple[dict, int]:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        headers = await signup_and_login(client, "bench-modes@example.com")
+        project = (await client.post("/api/projects/", json={"title": "bench"}, headers=headers)).json()
+        for i in range(tasks):
+            await client.post(f"/api/tasks/project/{project['id']}", json={"title": f"task {i}"}, headers=headers)
+    return headers, project["id"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks in the listed project")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("sync", "async"):
+        with scratch_database() as database_url, \
+                run_server(database_url, {"DATABASE_ASYNC": str(mode == "async").lower()}) as base_url:
+            headers, project_id = asyncio.run(seed(base_url, args.tasks))
+
+            async def list_tasks(client, i):
+                return await client.get(f"/api/tasks/project/{project_id}", headers=headers)
+
+            results[mode] = asyncio.run(drive(base_url, list_tasks, args.requests, args.concurrency))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Login throughput under concurrency with bcrypt in the threadpool vs the process pool.
+
+    python -m benchmarks.bench_login --requests 200 --concurrency 50
+
+Each configuration runs in a fresh server. 503 responses are logins shed by
+the hashing pool's queue limit (see PASSWORD_HASH_QUEUE_LIMIT).
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.common import drive, run_server, scratch_database, signup_and_login
+
+CONFIGS = {
+    "threadpool": {"PASSWORD_HASH_WORKERS": "0"},
+    "process_pool": {},
+    "process_pool_small_queue": {"PASSWORD_HASH_QUEUE_LIMIT": "4"},
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+    args = parser.parse_args()
+
+    results = {}
+    for name, env in CONFIGS.items():
+        env = {"BCRYPT_ROUNDS": str(args.rounds), **env}
+        with scratch_database() as database_url, run_server(database_url, env) as base_url:
+            async def seed():
+                async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+                    await signup_and_login(client, "bench-login@example.com")
+            asyncio.run(seed())
+
+            async def login(client, i):
+                return await client.post(
+                    "/api/auth/login", json={"email": "bench-login@example.com", "password": "bench-password"}
+                )
+
+            async def health(client, i):
+                return await client.get("/api/health")
+
+            async def login_with_background_traffic():
+                # Health checks running next to the login storm show whether the loop stays responsive
+                login_task = asyncio.create_task(drive(base_url, login, args.requests, args.concurrency))
+                health_result = await drive(base_url, health, args.requests, 5)
+                return await login_task, health_result
+
+            login_result, health_result = asyncio.run(login_with_background_traffic())
+            results[name] = {"login": login_result, "health_during_logins": health_result}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Serialization cost of the task list: ORM objects vs column rows + one TypeAdapter.
+
+    python -m benchmarks.bench_serialization --tasks 10000 --rounds 5
+
+Seeds one project with ``--tasks`` tasks, then times
+  in_process   building the full list body with the old per-object path
+               (ORM entities, model_validate per row, jsonable_encoder, json)
+               against select_fields + dump_json, without HTTP in the way;
+  http         fetching every task through the API, page by page and as one
+               ?stream=true NDJSON response.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import run_server, scratch_database
+from benchmarks.seed import PASSWORD, seed_database
+
+def _timed(fn, rounds: int) -> dict:
+    timings, size = [], 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(timings) * 1000, 1), "bytes": size}
+
+def in_process(database_url: str, rounds: int) -> dict:
+    os.environ["DATABASE_URL"] = database_url
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+
+    # Imported only for its side effect: it registers every model, which Task's relationships need
+    importlib.import_module("app.main")
+    from app.core.responses import dump_json, select_fields
+    from app.database import SessionLocal
+    from app.models.task import Task
+    from app.schemas.task import TaskOut
+
+    def orm_objects():
+        with SessionLocal() as db:
+            tasks = db.scalars(select(Task).order_by(Task.id)).all()
+            items = [TaskOut.model_validate(task) for task in tasks]
+            return json.dumps(jsonable_encoder(items)).encode()
+
+    def column_rows():
+        with SessionLocal() as db:
+            rows = db.execute(select_fields(Task, TaskOut).order_by(Task.id)).all()
+            return dump_json(list[TaskOut], rows)
+
+    return {"orm_objects": _timed(orm_objects, rounds), "column_rows": _timed(column_rows, rounds)}
+
+async def over_http(base_url: str, rounds: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        res = await client.post("/api/auth/login", json={"email": "user1@bench.example", "password": PASSWORD})
+        res.raise_for_status()
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+        async def paged():
+            total, cursor = 0, None
+            while True:
+                params = {"limit": 200, **({"cursor": cursor} if cursor else {})}
+                page = (await client.get("/api/tasks/project/1", params=params, headers=headers)).json()
+                total += len(page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return total
+
+        async def streamed():
+            res = await client.get("/api/tasks/project/1", params={"stream": "true"}, headers=headers)
+            return res.content.count(b"\n")
+
+        results = {}
+        for name, fetch in (("paged", paged), ("stream", streamed)):
+            timings, rows = [], 0
+            for _ in range(rounds):
+                started = time.perf_counter()
+                rows = await fetch()
+                timings.append(time.perf_counter() - started)
+            results[name] = {"median_ms": round(statistics.median(timings) * 1000, 1), "rows": rows}
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with scratch_database() as database_url:
+        seed_database(
+            database_url, users=1, projects_per_user=1, members_per_project=0,
+            tasks_per_project=args.tasks, comments_per_task=0,
+        )
+        results = {"in_process": in_process(database_url, args.rounds)}
+        with run_server(database_url) as base_url:
+            results["http"] = asyncio.run(over_http(base_url, args.rounds))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
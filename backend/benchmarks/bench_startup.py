@@ -0,0 +1,109 @@
+"""Cold-start cost: import time by package, and time until the server is live and ready.
+
+    python -m benchmarks.bench_startup --rounds 5
+
+Reports
+  imports   the median time to ``import app.main``, from ``python -X importtime``,
+            with self time summed per top-level package (the largest first)
+            and the optional modules that were not imported at all;
+  boot      for STARTUP_WARMUP=background and =blocking, the time from spawning
+            uvicorn until /api/health and /api/health/ready first answer 200.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, free_port, scratch_database
+
+# Heavy or optional dependencies that a plain import of the app should not load
+DEFERRED = ("jose", "passlib", "alembic", "redis", "pyinstrument")
+
+def _importtime(env: dict) -> tuple:
+    """(total seconds, {package: self seconds}) for one fresh ``import app.main``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total, packages = 0.0, defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():
+            continue  # the header row
+        packages[name.split(".")[0]] += int(self_us) / 1e6
+        if name == "app.main":
+            total = int(cumulative_us) / 1e6
+    return total, packages
+
+def imports(database_url: str, rounds: int, top: int) -> dict:
+    env = {**os.environ, "DATABASE_URL": database_url}
+    runs = [_importtime(env) for _ in range(rounds)]
+    totals = [total for total, _ in runs]
+    _, packages = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    loaded = subprocess.run(
+        [sys.executable, "-c", f"import sys, app.main; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    return {
+        "median_ms": round(statistics.median(totals) * 1000, 1),
+        "by_package_ms": {
+            name: round(seconds * 1000, 1)
+            for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "deferred": [name for name in DEFERRED if name not in loaded.split(",")],
+    }
+
+def _boot(database_url: str, warmup: str) -> dict:
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "STARTUP_WARMUP": warmup}
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    timings = {}
+    try:
+        deadline = started + 60
+        while len(timings) < 2:
+            if time.perf_counter() > deadline or proc.poll() is not None:
+                raise RuntimeError("server did not become ready")
+            for name, path in (("live_ms", "/api/health"), ("ready_ms", "/api/health/ready")):
+                if name in timings:
+                    continue
+                try:
+                    if httpx.get(base_url + path).status_code == 200:
+                        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+                except httpx.TransportError:
+                    pass
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return timings
+
+def boot(database_url: str, rounds: int) -> dict:
+    results = {}
+    for warmup in ("background", "blocking"):
+        runs = [_boot(database_url, warmup) for _ in range(rounds)]
+        results[warmup] = {key: statistics.median(run[key] for run in runs) for key in ("live_ms", "ready_ms")}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages listed by import self time")
+    args = parser.parse_args()
+
+    with scratch_database() as database_url:
+        results = {"imports": imports(database_url, args.rounds, args.top), "boot": boot(database_url, args.rounds)}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
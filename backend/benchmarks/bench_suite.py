@@ -0,0 +1,262 @@
+"""Scenario-based load test that writes a JSON baseline to diff between commits.
+
+    python -m benchmarks.bench_suite --output baseline.json
+    python -m benchmarks.bench_suite --compare baseline.json --max-regression 0.2
+
+The suite seeds a scratch SQLite database with ``benchmarks.seed``. Set
+BENCH_DATABASE_URL to use an empty, migrated Postgres database instead. It
+then starts the API and runs each scenario in turn:
+
+  dashboard_load   list projects, project summaries and a board's tasks
+  dashboard_poll   the same reads revalidated with If-None-Match
+  board_drag_drop  status changes on board tasks
+  comment_burst    many comments on a few hot tasks, with reads mixed in
+  search           full-text queries across the caller's projects
+  login_storm      password logins (bcrypt bound)
+
+For each scenario it records throughput, p50/p95/p99 latency in ms and the mean
+SQL statements per request. ``--compare`` prints the change against an earlier
+baseline. It exits non-zero when p95 grows or throughput drops by more than
+``--max-regression``, or when any scenario issues more queries per request.
+It also exits non-zero, with or without ``--compare``, when any request went
+over its route's query budget (``query_budget_exceeded`` in /api/metrics).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+import httpx
+from sqlalchemy import create_engine, select
+
+from benchmarks.common import BACKEND_DIR, METRICS_TOKEN, drive, run_server, scratch_database
+from benchmarks.seed import PASSWORD, WORDS, add_scale_arguments, scale_from_args, seed_database
+
+@dataclass
+class Client:
+    user_id: int
+    headers: dict
+    project_ids: list = field(default_factory=list)
+    task_ids: list = field(default_factory=list)
+
+async def login_clients(base_url: str, count: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as http:
+        async def login(user_id):
+            res = await http.post("/api/auth/login", json={"email": f"user{user_id}@bench.example", "password": PASSWORD})
+            res.raise_for_status()
+            return Client(user_id, {"Authorization": f"Bearer {res.json()['access_token']}"})
+        return await asyncio.gather(*(login(user_id) for user_id in range(1, count + 1)))
+
+def load_boards(database_url: str, clients: list):
+    """Fill in each client's project and task ids straight from the database."""
+    from app.models.project import Project
+    from app.models.task import Task
+
+    by_user = {client.user_id: client for client in clients}
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            projects = conn.execute(
+                select(Project.id, Project.owner_id).where(Project.owner_id.in_(by_user)).order_by(Project.id)
+            ).all()
+            owner_of = {}
+            for project_id, owner_id in projects:
+                by_user[owner_id].project_ids.append(project_id)
+                owner_of[project_id] = owner_id
+            tasks = conn.execute(
+                select(Task.id, Task.project_id).where(Task.project_id.in_(owner_of)).order_by(Task.id)
+            ).all()
+            for task_id, project_id in tasks:
+                by_user[owner_of[project_id]].task_ids.append(task_id)
+    finally:
+        engine.dispose()
+
+def _dashboard_url(client: Client, i: int) -> str:
+    step = i % 3
+    if step == 0:
+        return "/api/projects/"
+    if step == 1:
+        return "/api/projects/summaries"
+    return f"/api/tasks/project/{client.project_ids[(i // 3) % len(client.project_ids)]}"
+
+def dashboard_load(clients, users):
+    async def request(http, i):
+        client = clients[i % len(clients)]
+        return await http.get(_dashboard_url(client, i), headers=client.headers)
+    return request
+
+def dashboard_poll(clients, users):
+    etags = {}
+
+    async def request(http, i):
+        # The same reads, revalidated with the last ETag the way a browser cache would
+        client = clients[i % len(clients)]
+        url = _dashboard_url(client, i)
+        headers = dict(client.headers)
+        if (client.user_id, url) in etags:
+            headers["If-None-Match"] = etags[(client.user_id, url)]
+        res = await http.get(url, headers=headers)
+        if "etag" in res.headers:
+            etags[(client.user_id, url)] = res.headers["etag"]
+        return res
+    return request
+
+def board_drag_drop(clients, users):
+    targets = ("mark-in-progress", "mark-done", "mark-todo")
+
+    async def request(http, i):
+        client = clients[i % len(clients)]
+        task_id = client.task_ids[(i * 7919) % len(client.task_ids)]
+        return await http.patch(f"/api/tasks/{task_id}/{targets[i % 3]}", headers=client.headers)
+    return request
+
+def comment_burst(clients, users):
+    hot = [(client, client.task_ids[0]) for client in clients[:5]]
+
+    async def request(http, i):
+        client, task_id = hot[i % len(hot)]
+        if i % 4 == 3:
+            return await http.get(f"/api/comments/task/{task_id}", headers=client.headers)
+        return await http.post(f"/api/comments/task/{task_id}", json={"content": f"burst {i}"}, headers=client.headers)
+    return request
+
+def search(clients, users):
+    async def request(http, i):
+        client = clients[i % len(clients)]
+        return await http.get("/api/search", params={"q": WORDS[i % len(WORDS)][:4]}, headers=client.headers)
+    return request
+
+def login_storm(clients, users):
+    async def request(http, i):
+        email = f"user{i % users + 1}@bench.example"
+        return await http.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    return request
+
+# name -> (request factory, share of --requests; bcrypt makes logins far slower than the rest)
+SCENARIOS = {
+    "dashboard_load": (dashboard_load, 1.0),
+    "dashboard_poll": (dashboard_poll, 1.0),
+    "board_drag_drop": (board_drag_drop, 1.0),
+    "comment_burst": (comment_burst, 1.0),
+    "search": (search, 1.0),
+    "login_storm": (login_storm, 0.1),
+}
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def budget_breaches(base_url: str) -> dict:
+    """``{route: requests over budget}`` from the server's metrics."""
+    response = httpx.get(f"{base_url}/api/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})
+    response.raise_for_status()
+    text = response.text
+    return {
+        route: int(float(count))
+        for route, count in re.findall(r'^query_budget_exceeded_total\{route="([^"]*)"\} (\S+)$', text, re.M)
+        if float(count)
+    }
+
+def compare(old: dict, new: dict, max_regression: float) -> list:
+    """Print a per-scenario diff and return the regressions that exceed the threshold."""
+    failures = []
+    print(f"{'scenario':<18}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            a, b = before.get(metric), current.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            print(f"{name:<18}{metric:<22}{a:>12}{b:>12}{change:>+10.1%}")
+            if metric == "p95_ms" and change > max_regression:
+                failures.append(f"{name}: p95 {a} -> {b} ms")
+            if metric == "rps" and change < -max_regression:
+                failures.append(f"{name}: throughput {a} -> {b} rps")
+            if metric == "queries_per_request" and b > a:
+                failures.append(f"{name}: queries per request {a} -> {b}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=20, help="distinct logged-in users driving the load")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset to run")
+    parser.add_argument("--async-db", action="store_true", help="run the server with DATABASE_ASYNC=true")
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", 12)), help="BCRYPT_ROUNDS")
+    parser.add_argument("--output", help="write the baseline JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier baseline JSON to diff against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    scale = scale_from_args(args)
+    # Seed hashes and the server must agree, or every login would also rehash
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    results = {}
+    with scratch_database() as database_url:
+        started = time.perf_counter()
+        seeded = seed_database(database_url, **scale)
+        seed_seconds = round(time.perf_counter() - started, 1)
+        env = {"DATABASE_ASYNC": str(args.async_db).lower()}
+        with run_server(database_url, env) as base_url:
+            clients = asyncio.run(login_clients(base_url, min(args.clients, args.users)))
+            load_boards(database_url, clients)
+            for name in names:
+                factory, share = SCENARIOS[name]
+                total = max(int(args.requests * share), args.concurrency)
+                results[name] = asyncio.run(drive(base_url, factory(clients, args.users), total, args.concurrency))
+                print(f"{name}: {results[name]['rps']} rps, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+            breaches = budget_breaches(base_url)
+
+    baseline = {
+        "meta": {
+            "commit": git_commit(),
+            "database": database_url.split(":", 1)[0],
+            "database_async": args.async_db,
+            "bcrypt_rounds": args.rounds,
+            "python": platform.python_version(),
+            "scale": scale,
+            "seeded": seeded,
+            "seed_seconds": seed_seconds,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "clients": len(clients),
+        },
+        "scenarios": results,
+        "budget_breaches": breaches,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(baseline, fh, indent=2)
+    else:
+        print(json.dumps(baseline, indent=2))
+
+    failures = [f"{route}: {count} requests over its query budget" for route, count in breaches.items()]
+    if args.compare:
+        with open(args.compare) as fh:
+            failures += compare(json.load(fh), baseline, args.max_regression)
+    if failures:
+        print("Regressions:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Project import and export throughput.
+
+    python -m benchmarks.bench_transfer --tasks 1000000
+
+Uploads a generated JSONL (or CSV) file of ``--tasks`` tasks to
+POST /api/projects/import, then streams it back from
+GET /api/projects/{id}/export, and reports rows/sec for both directions.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import run_server, scratch_database, signup_and_login
+from benchmarks.seed import WORDS
+
+def write_file(path: str, tasks: int, comments_per_task: int, format: str):
+    statuses, priorities = ("To-do", "In-progress", "Done"), ("Low", "Medium", "High")
+    with open(path, "w", newline="") as f:
+        records = [{"record": "project", "title": "bench import"}]
+        writer = csv.DictWriter(f, fieldnames=["record", "id", "task_id", "title", "status", "priority", "content"])
+        if format == "csv":
+            writer.writeheader()
+
+        def flush():
+            if format == "csv":
+                writer.writerows(records)
+            else:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+            records.clear()
+
+        for i in range(1, tasks + 1):
+            records.append({
+                "record": "task", "id": i, "title": f"{WORDS[i % len(WORDS)]} {i}",
+                "status": statuses[i % 3], "priority": priorities[i % 3],
+            })
+            records += [
+                {"record": "comment", "task_id": i, "content": f"{WORDS[(i + j) % len(WORDS)]} note"}
+                for j in range(comments_per_task)
+            ]
+            if len(records) >= 10000:
+                flush()
+        flush()
+
+async def _login(base_url: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        return await signup_and_login(client, "bench-transfer@example.com")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--comments-per-task", type=int, default=0)
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, scratch_database() as database_url, run_server(database_url) as base_url:
+        path = os.path.join(tmp, f"import.{args.format}")
+        write_file(path, args.tasks, args.comments_per_task, args.format)
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            headers = asyncio.run(_login(base_url))
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                res = client.post("/api/projects/import", files={"file": (os.path.basename(path), f)}, headers=headers)
+            res.raise_for_status()
+            elapsed = time.perf_counter() - started
+            imported = res.json()
+            rows = imported["tasks"] + imported["comments"]
+            results["import"] = {"rows": rows, "seconds": round(elapsed, 2), "rows_per_sec": round(rows / elapsed)}
+
+            started = time.perf_counter()
+            size = 0
+            params = {"format": args.format}
+            with client.stream("GET", f"/api/projects/{imported['project']['id']}/export", params=params, headers=headers) as res:
+                for chunk in res.iter_bytes():
+                    size += len(chunk)
+            elapsed = time.perf_counter() - started
+            results["export"] = {
+                "rows": rows, "seconds": round(elapsed, 2), "rows_per_sec": round(rows / elapsed),
+                "mb": round(size / 2**20, 1),
+            }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput as the production launcher scales from 1 to N worker processes.
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --requests 6000 --concurrency 128
+
+Each step starts ``python -m app.serve`` with WEB_CONCURRENCY set to the
+worker count, warms every worker up, and then lists a board's tasks from
+``--clients`` load-generator processes. A single Python client saturates
+before a multi-core server does, so the load is spread over several. The
+response cache is off, so every request does its SQL and serialization.
+Leave cores free for the clients; otherwise they compete with the workers
+for the same CPUs.
+
+Reports requests/sec per step, its speed-up over one worker, and latency.
+p50 is the median across clients; p95 and p99 are the worst client's.
+Throughput stops growing at the CPU count, and SQLite's single writer lock
+does not matter here because the load is reads only. Set
+BENCH_DATABASE_URL to measure against Postgres.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_db_modes import seed
+from benchmarks.common import drive, run_server, scratch_database
+
+async def list_tasks(headers: dict, project_id: int, client, i):
+    return await client.get(f"/api/tasks/project/{project_id}", headers=headers)
+
+def _client(base_url: str, make_request, requests: int, concurrency: int) -> dict:
+    return asyncio.run(drive(base_url, make_request, requests, concurrency))
+
+def step(database_url: str, workers: int, args) -> dict:
+    env = {"WEB_CONCURRENCY": str(workers), "RESPONSE_CACHE": "off"}
+    with run_server(database_url, env, launcher=True) as base_url:
+        headers, project_id = asyncio.run(seed(base_url, args.tasks))
+        make_request = functools.partial(list_tasks, headers, project_id)
+        per_client = max(1, args.concurrency // args.clients)
+        with ProcessPoolExecutor(args.clients) as pool:
+            # Every worker answers a few requests (and opens its pool) before the clock starts
+            list(pool.map(_client, *zip(*[(base_url, make_request, 50 * workers, per_client)] * args.clients)))
+            started = time.perf_counter()
+            runs = list(pool.map(
+                _client, *zip(*[(base_url, make_request, args.requests // args.clients, per_client)] * args.clients)
+            ))
+            elapsed = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "rps": round(sum(run["requests"] for run in runs) / elapsed, 1),
+        "errors": sum(run["errors"] for run in runs),
+        "p50_ms": statistics.median(run["p50_ms"] for run in runs),
+        "p95_ms": max(run["p95_ms"] for run in runs),
+        "p99_ms": max(run["p99_ms"] for run in runs),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts, default 1..CPU count")
+    parser.add_argument("--requests", type=int, default=6000)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--clients", type=int, default=max(1, min(os.cpu_count() or 1, 8)),
+                        help="load-generator processes")
+    parser.add_argument("--tasks", type=int, default=50, help="tasks in the listed project")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else list(range(1, (os.cpu_count() or 1) + 1))
+    results = []
+    for workers in counts:
+        with scratch_database() as database_url:
+            results.append(step(database_url, workers, args))
+    baseline = results[0]["rps"]
+    for result in results:
+        result["speedup"] = round(result["rps"] / baseline, 2) if baseline else None
+    print(json.dumps({"cpus": os.cpu_count(), "clients": args.clients, "steps": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Shared helpers for the benchmark scripts: a throwaway server and a load driver."""
+import asyncio
+import contextlib
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Servers started by run_server accept this as the bearer token for /api/metrics
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or secrets.token_urlsafe(16)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def migrate(database_url: str):
+    env = {**os.environ, "DATABASE_URL": database_url}
+    subprocess.run(["alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+@contextlib.contextmanager
+def scratch_database():
+    """A migrated SQLite database in a temporary directory, unless BENCH_DATABASE_URL is set."""
+    if os.getenv("BENCH_DATABASE_URL"):
+        migrate(os.environ["BENCH_DATABASE_URL"])
+        yield os.environ["BENCH_DATABASE_URL"]
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        migrate(url)
+        yield url
+
+@contextlib.contextmanager
+def run_server(database_url: str, extra_env: dict | None = None, args: list | None = None, launcher: bool = False):
+    """Start uvicorn on a free port and yield its base URL once /api/health answers.
+
+    With ``launcher`` the production launcher (``python -m app.serve``) is started
+    instead, configured through ``extra_env`` (WEB_CONCURRENCY, ...).
+    Rate limiting is off unless RATE_LIMIT is set: load drivers are single clients by design.
+    """
+    port = free_port()
+    env = {
+        "RATE_LIMIT": "off", **os.environ, "DATABASE_URL": database_url, "METRICS_TOKEN": METRICS_TOKEN,
+        **(extra_env or {}),
+    }
+    if launcher:
+        env.update(HOST="127.0.0.1", PORT=str(port), LOG_LEVEL="warning")
+        cmd = [sys.executable, "-m", "app.serve", *(args or [])]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", *(args or [])]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/api/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or proc.poll() is not None:
+                raise RuntimeError("server did not start")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+async def signup_and_login(client: httpx.AsyncClient, email: str, password: str = "bench-password") -> dict:
+    await client.post("/api/auth/signup", json={"name": email.split("@")[0], "email": email, "password": password})
+    res = await client.post("/api/auth/login", json={"email": email, "password": password})
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+async def drive(base_url: str, make_request, total: int, concurrency: int) -> dict:
+    """Issue ``total`` requests from ``concurrency`` workers; ``make_request(client, i)``
+    performs one request. Returns throughput, latency percentiles in ms and the
+    mean SQL statements per request (from the ``X-Query-Count`` header)."""
+    latencies = []
+    queries = []
+    statuses = {}
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                res = await make_request(client, i)
+                latencies.append(time.perf_counter() - start)
+                statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+                if "x-query-count" in res.headers:
+                    queries.append(int(res.headers["x-query-count"]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+    return {
+        "requests": total,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "concurrency": concurrency,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
@@ -0,0 +1,152 @@
+"""Seeded data generator: users, projects, memberships, tasks and comments at a chosen scale.
+
+    python -m benchmarks.seed --url sqlite:///bench.db --users 1000 --tasks-per-project 200
+
+Writes straight to an empty, migrated database with bulk Core inserts. The
+same ``--seed`` always produces the same data. Every user's password is
+``bench-password``, and the task counter table is filled to match.
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+
+from sqlalchemy import create_engine, insert, text
+
+PASSWORD = "bench-password"
+CHUNK = 5000
+WORDS = (
+    "report design review deploy fix bug release sprint budget client onboarding migrate database "
+    "invoice roadmap feature test refactor cache search mobile api dashboard metrics security audit"
+).split()
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def seed_database(
+    database_url: str,
+    users: int = 100,
+    projects_per_user: int = 3,
+    members_per_project: int = 2,
+    tasks_per_project: int = 100,
+    comments_per_task: int = 2,
+    seed: int = 42,
+) -> dict:
+    """Fill ``database_url`` and return the row counts written."""
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from app.core.security import hash_password
+    from app.models.comment import Comment
+    from app.models.project import Project, project_members
+    from app.models.task import Task, TaskPriority, TaskStatus
+    from app.models.task_count import ProjectTaskCount
+    from app.models.user import User
+
+    rng = random.Random(seed)
+    password_hash = hash_password(PASSWORD)
+    statuses, priorities = list(TaskStatus), list(TaskPriority)
+    written = Counter()
+    # Parents first, so flushing in this order never violates a foreign key
+    tables = {
+        "projects": Project.__table__, "members": project_members, "tasks": Task.__table__,
+        "comments": Comment.__table__, "counts": ProjectTaskCount.__table__,
+    }
+    buffers = {name: [] for name in tables}
+
+    def flush(conn):
+        for name, table in tables.items():
+            if buffers[name]:
+                conn.execute(insert(table), buffers[name])
+                written[name] += len(buffers[name])
+                buffers[name].clear()
+
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as conn:
+            # Explicit ids keep the generator deterministic and free of RETURNING round trips
+            user_rows = [
+                {"id": i, "name": f"user{i}", "email": f"user{i}@bench.example", "password": password_hash}
+                for i in range(1, users + 1)
+            ]
+            for start in range(0, users, CHUNK):
+                conn.execute(insert(User.__table__), user_rows[start:start + CHUNK])
+            written["users"] = users
+
+            project_id = task_id = comment_id = 0
+            for owner_id in range(1, users + 1):
+                for _ in range(projects_per_user):
+                    project_id += 1
+                    buffers["projects"].append({
+                        "id": project_id, "title": _sentence(rng, 3), "description": _sentence(rng, 8),
+                        "owner_id": owner_id,
+                    })
+                    members = [m for m in rng.sample(range(1, users + 1), min(members_per_project, users)) if m != owner_id]
+                    buffers["members"] += [{"project_id": project_id, "user_id": m} for m in members]
+                    team = [owner_id] + members
+                    counts = Counter()
+                    for _ in range(tasks_per_project):
+                        task_id += 1
+                        status, priority = rng.choice(statuses), rng.choice(priorities)
+                        assignee_id = rng.choice(team + [None])
+                        buffers["tasks"].append({
+                            "id": task_id, "title": _sentence(rng, 4), "description": _sentence(rng, 15),
+                            "status": status, "priority": priority, "project_id": project_id,
+                            "assignee_id": assignee_id,
+                        })
+                        counts[("status", status.name)] += 1
+                        counts[("priority", priority.name)] += 1
+                        counts[("assignee", str(assignee_id) if assignee_id is not None else "none")] += 1
+                        for _ in range(comments_per_task):
+                            comment_id += 1
+                            buffers["comments"].append({
+                                "id": comment_id, "content": _sentence(rng, 10),
+                                "task_id": task_id, "user_id": rng.choice(team),
+                            })
+                    buffers["counts"] += [
+                        {"project_id": project_id, "dimension": dimension, "value": value, "count": count}
+                        for (dimension, value), count in counts.items()
+                    ]
+                    if len(buffers["tasks"]) + len(buffers["comments"]) >= CHUNK:
+                        flush(conn)
+            flush(conn)
+
+            if conn.dialect.name == "postgresql":
+                # Explicit ids leave the serial sequences behind; move them past the seeded rows
+                for table in ("users", "projects", "tasks", "comments"):
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                    ))
+    finally:
+        engine.dispose()
+    return {name: written[name] for name in ("users", "projects", "members", "tasks", "comments")}
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--projects-per-user", type=int, default=3)
+    parser.add_argument("--members-per-project", type=int, default=2)
+    parser.add_argument("--tasks-per-project", type=int, default=100)
+    parser.add_argument("--comments-per-task", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+
+def scale_from_args(args) -> dict:
+    return {
+        "users": args.users,
+        "projects_per_user": args.projects_per_user,
+        "members_per_project": args.members_per_project,
+        "tasks_per_project": args.tasks_per_project,
+        "comments_per_task": args.comments_per_task,
+        "seed": args.seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True, help="migrated, empty database")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    written = seed_database(args.url, **scale_from_args(args))
+    print(f"Seeded {written} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Fail when the Alembic migrations and the SQLAlchemy models drift apart.
+
+Upgrades a scratch SQLite database (or the database given with ``--url``) to
+head and diffs it against ``Base.metadata``. Exits non-zero if a migration is
+missing or the migrated schema does not match the models.
+
+    python -m scripts.check_schema
+    python -m scripts.check_schema --url postgresql://...
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def check(url: str) -> list:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(config, "head")
+
+    from app.database import Base, import_models
+    from app.core.search import include_object
+
+    import_models()
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            context = MigrationContext.configure(connection, opts={"include_object": include_object})
+            return compare_metadata(context, Base.metadata)
+    finally:
+        engine.dispose()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="database to migrate and compare (default: scratch SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'schema_check.db')}"
+        # app.database builds its engine at import (alembic's env imports it), and needs a URL
+        os.environ.setdefault("DATABASE_URL", url)
+        diffs = check(url)
+
+    if diffs:
+        print("Schema drift between migrations and models:")
+        for diff in diffs:
+            print(f"  {diff}")
+        print("Add a migration with: alembic revision --autogenerate -m '<message>'")
+        return 1
+    print("Migrations and models are in sync.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
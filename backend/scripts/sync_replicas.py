@@ -0,0 +1,58 @@
+"""Stand-in replication for trying read replicas locally with SQLite.
+
+Copies the SQLite database in DATABASE_URL over each SQLite file in
+DATABASE_REPLICA_URLS (or ``--url`` / ``--replica``), once or every
+``--interval`` seconds. The interval plays the part of replication lag.
+
+    DATABASE_URL=sqlite:///./app.db \\
+    DATABASE_REPLICA_URLS=sqlite:///./replica1.db,sqlite:///./replica2.db \\
+    python -m scripts.sync_replicas --interval 2
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from sqlalchemy.engine import make_url
+
+def sqlite_path(url: str) -> str:
+    parsed = make_url(url)
+    if not parsed.drivername.startswith("sqlite") or not parsed.database or parsed.database == ":memory:":
+        raise SystemExit(f"Not a SQLite file URL: {url}")
+    return parsed.database
+
+def sync(primary: str, replicas: list):
+    source = sqlite3.connect(primary)
+    try:
+        for replica in replicas:
+            target = sqlite3.connect(replica)
+            try:
+                # The backup API copies a consistent snapshot, even while the app writes
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--replica", action="append", help="replica URL, repeatable")
+    parser.add_argument("--interval", type=float, default=0, help="seconds between copies; 0 copies once")
+    args = parser.parse_args()
+
+    replica_urls = args.replica or [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    if not args.url or not replica_urls:
+        parser.error("need DATABASE_URL and at least one replica")
+    primary = sqlite_path(args.url)
+    replicas = [sqlite_path(url) for url in replica_urls]
+    while True:
+        sync(primary, replicas)
+        if not args.interval:
+            return
+        print(f"synced {len(replicas)} replicas", file=sys.stderr)
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Shared fixtures: a migrated scratch SQLite database and a client for the app.
+
+The app reads its settings at import, so they are set here before anything
+imports ``app``. Query budgets are strict, so a route that goes over its
+budget fails its request (and the test) instead of logging a warning.
+"""
+import os
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_tmp = tempfile.TemporaryDirectory()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'test.db')}"
+os.environ.update(
+    QUERY_BUDGET_STRICT="true",
+    RATE_LIMIT="off",
+    # Cached and 304 responses skip the SQL the budgets are about
+    RESPONSE_CACHE="off",
+    # Every access check reloads the caller's project ids: budgets must hold with a cold cache
+    ACCESS_CACHE_TTL_SECONDS="0",
+    STARTUP_WARMUP="blocking",
+    PASSWORD_HASH_WORKERS="0",
+    BCRYPT_ROUNDS="4",
+    JOB_WORKERS="0",
+)
+
+@pytest.fixture(scope="session")
+def client():
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    command.upgrade(config, "head")
+
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+    _tmp.cleanup()
+
+def signup(client, name: str) -> tuple:
+    """(user id, auth headers) for a new account."""
+    email = f"{name}@example.com"
+    user = client.post("/api/auth/signup", json={"name": name, "email": email, "password": "secret"}).json()
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret"}).json()["access_token"]
+    return user["id"], {"Authorization": f"Bearer {token}"}
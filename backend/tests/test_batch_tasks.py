@@ -0,0 +1,101 @@
+"""POST /api/tasks/batch: per-item results, a statement count that does not grow
+with the batch, and counts and activity that match what was written."""
+import time
+
+import pytest
+
+from tests.conftest import signup
+
+# Matches the route's query_budget; raise both together
+BUDGET = 11
+
+@pytest.fixture
+def board(client):
+    suffix = time.monotonic_ns()
+    _, owner = signup(client, f"batch-owner-{suffix}")
+    _, outsider = signup(client, f"batch-outsider-{suffix}")
+    project_id = client.post("/api/projects/", json={"title": "Batch"}, headers=owner).json()["id"]
+    other_id = client.post("/api/projects/", json={"title": "Not yours"}, headers=outsider).json()["id"]
+    other_task = client.post(f"/api/tasks/project/{other_id}", json={"title": "Theirs"}, headers=outsider).json()
+    return {
+        "project_id": project_id, "owner": owner, "outsider": outsider,
+        "other_project_id": other_id, "other_task_id": other_task["id"],
+    }
+
+def create_tasks(client, board, count):
+    response = client.post("/api/tasks/batch", json={"operations": [
+        {"op": "create", "project_id": board["project_id"], "task": {"title": f"Task {i}"}} for i in range(count)
+    ]}, headers=board["owner"])
+    assert response.status_code == 200
+    tasks = [result["task"] for result in response.json()["results"]]
+    assert [task["title"] for task in tasks] == [f"Task {i}" for i in range(count)]
+    return tasks
+
+def mixed_batch(board, tasks):
+    """Creates, updates, status changes and deletes, a third of ``tasks`` each."""
+    third = len(tasks) // 3
+    return (
+        [{"op": "create", "project_id": board["project_id"], "task": {"title": f"New {i}"}} for i in range(third)]
+        + [{"op": "update", "task_id": task["id"], "task": {"title": "Renamed"}} for task in tasks[:third]]
+        + [{"op": "set_status", "task_id": task["id"], "status": "Done"} for task in tasks[third:2 * third]]
+        + [{"op": "delete", "task_id": task["id"]} for task in tasks[2 * third:3 * third]]
+    )
+
+@pytest.mark.parametrize("size", [3, 300])
+def test_mixed_batch_stays_within_budget(client, board, size):
+    tasks = create_tasks(client, board, size)
+    operations = mixed_batch(board, tasks)
+    response = client.post("/api/tasks/batch", json={"operations": operations}, headers=board["owner"])
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) <= BUDGET
+    assert [result["status_code"] for result in response.json()["results"]] == [201] * (size // 3) + [200] * (
+        3 * (size // 3)
+    )
+
+def test_items_fail_on_their_own(client, board):
+    task, twice, stale = create_tasks(client, board, 3)
+    operations = [
+        {"op": "update", "task_id": 10 ** 9, "task": {"title": "Missing"}},
+        {"op": "create", "project_id": 10 ** 9, "task": {"title": "Nowhere"}},
+        {"op": "set_status", "task_id": board["other_task_id"], "status": "Done"},
+        {"op": "create", "project_id": board["other_project_id"], "task": {"title": "Intruder"}},
+        {"op": "set_status", "task_id": twice["id"], "status": "Done"},
+        {"op": "delete", "task_id": twice["id"]},
+        {"op": "update", "task_id": stale["id"], "task": {"title": "Late"}, "version": stale["version"] + 1},
+        {"op": "update", "task_id": task["id"], "task": {"title": "Fine"}, "version": task["version"]},
+    ]
+    response = client.post("/api/tasks/batch", json={"operations": operations}, headers=board["owner"])
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) <= BUDGET
+    results = response.json()["results"]
+    assert [result["status_code"] for result in results] == [404, 404, 403, 403, 200, 409, 409, 200]
+    assert results[7]["task"]["version"] == task["version"] + 1
+
+    other = client.get(f"/api/tasks/project/{board['other_project_id']}", headers=board["outsider"]).json()["items"]
+    assert [row["title"] for row in other] == ["Theirs"]
+    assert other[0]["status"] != "Done"
+    listed = client.get(f"/api/tasks/project/{board['project_id']}", headers=board["owner"]).json()["items"]
+    assert {row["id"]: row["title"] for row in listed} == {task["id"]: "Fine", twice["id"]: "Task 1", stale["id"]: "Task 2"}
+
+def test_counts_and_activity_follow_the_batch(client, board):
+    tasks = create_tasks(client, board, 6)
+    operations = mixed_batch(board, tasks)
+    assert client.post("/api/tasks/batch", json={"operations": operations}, headers=board["owner"]).status_code == 200
+
+    project_id = board["project_id"]
+    listed = client.get(f"/api/tasks/project/{project_id}?limit=100", headers=board["owner"]).json()["items"]
+    by_status = {}
+    for task in listed:
+        by_status[task["status"]] = by_status.get(task["status"], 0) + 1
+    summary = client.get(f"/api/projects/{project_id}/summary", headers=board["owner"]).json()
+    assert summary["total"] == len(listed) == 6
+    assert {status: count for status, count in summary["by_status"].items() if count} == by_status
+
+    activity = client.get(f"/api/projects/{project_id}/activity?limit=100", headers=board["owner"]).json()["items"]
+    kinds = {}
+    for entry in activity:
+        kinds[entry["kind"]] = kinds.get(entry["kind"], 0) + 1
+    assert kinds["task.created"] == 6 + 2
+    assert kinds["task.updated"] == 2
+    assert kinds["task.status_changed"] == 2
+    assert kinds["task.deleted"] == 2
@@ -0,0 +1,60 @@
+"""ETags on the read routes: If-None-Match gets a 304 after the access check, and
+a write moves the ETag on so neither the client nor the response cache serves stale data."""
+import time
+
+import pytest
+
+from app.core import cache
+from tests.conftest import signup
+
+READS = [
+    "/api/projects/",
+    "/api/projects/{project_id}",
+    "/api/projects/{project_id}/activity",
+    "/api/tasks/project/{project_id}",
+    "/api/comments/task/{task_id}",
+]
+MEMBER_READS = READS[1:]
+
+@pytest.fixture
+def board(client):
+    suffix = time.monotonic_ns()
+    _, owner = signup(client, f"etag-owner-{suffix}")
+    _, outsider = signup(client, f"etag-outsider-{suffix}")
+    project_id = client.post("/api/projects/", json={"title": "Cached"}, headers=owner).json()["id"]
+    task_id = client.post(f"/api/tasks/project/{project_id}", json={"title": "First"}, headers=owner).json()["id"]
+    client.post(f"/api/comments/task/{task_id}", json={"content": "Hello"}, headers=owner)
+    return {"project_id": project_id, "task_id": task_id, "owner": owner, "outsider": outsider}
+
+def url(path: str, board: dict) -> str:
+    return path.format(project_id=board["project_id"], task_id=board["task_id"])
+
+@pytest.mark.parametrize("path", READS)
+def test_matching_etag_is_not_modified(client, board, path):
+    first = client.get(url(path, board), headers=board["owner"])
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    again = client.get(url(path, board), headers={**board["owner"], "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+@pytest.mark.parametrize("path", MEMBER_READS)
+def test_valid_etag_does_not_bypass_access(client, board, path):
+    etag = client.get(url(path, board), headers=board["owner"]).headers["ETag"]
+    response = client.get(url(path, board), headers={**board["outsider"], "If-None-Match": etag})
+    assert response.status_code == 403
+
+@pytest.mark.parametrize("path", READS)
+def test_write_changes_the_etag(client, board, monkeypatch, path):
+    monkeypatch.setattr(cache, "response_cache", cache.MemoryResponseCache(100, 60))
+    first = client.get(url(path, board), headers=board["owner"])
+    assert client.get(url(path, board), headers=board["owner"]).content == first.content
+
+    # Adding a comment bumps the project's data_version through bump_project_versions
+    client.post(f"/api/comments/task/{board['task_id']}", json={"content": "Again"}, headers=board["owner"])
+    response = client.get(url(path, board), headers={**board["owner"], "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    if "/comments/" in path or "/activity" in path:
+        assert response.content != first.content
@@ -0,0 +1,55 @@
+"""If-Match on task and project writes: a stale version is a 409, no If-Match is last-write-wins."""
+import time
+
+import pytest
+
+from tests.conftest import signup
+
+@pytest.fixture
+def task(client):
+    _, headers = signup(client, f"if-match-{time.monotonic_ns()}")
+    project = client.post("/api/projects/", json={"title": "Conditional"}, headers=headers).json()
+    task = client.post(f"/api/tasks/project/{project['id']}", json={"title": "Draft"}, headers=headers).json()
+    return {"headers": headers, "project": project, "id": task["id"], "version": task["version"]}
+
+def test_matching_if_match_writes_and_returns_the_new_etag(client, task):
+    headers = {**task["headers"], "If-Match": f'"{task["version"]}"'}
+    response = client.put(f"/api/tasks/{task['id']}", json={"title": "Edited"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == task["version"] + 1
+    assert response.headers["ETag"] == f'"{task["version"] + 1}"'
+
+def test_stale_if_match_is_a_conflict(client, task):
+    url = f"/api/tasks/{task['id']}"
+    assert client.put(url, json={"title": "Theirs"}, headers=task["headers"]).status_code == 200
+    stale = {**task["headers"], "If-Match": f'"{task["version"]}"'}
+    for response in (
+        client.put(url, json={"title": "Mine"}, headers=stale),
+        client.patch(f"{url}/mark-done", headers=stale),
+    ):
+        assert response.status_code == 409
+        # The current version, so the client can reload and retry
+        assert response.headers["ETag"] == f'"{task["version"] + 1}"'
+    tasks = client.get(f"/api/tasks/project/{task['project']['id']}", headers=task["headers"]).json()["items"]
+    assert [(t["title"], t["status"]) for t in tasks] == [("Theirs", "To-do")]
+
+def test_without_if_match_the_last_write_wins(client, task):
+    url = f"/api/tasks/{task['id']}"
+    # Two clients that both loaded version 1, neither sending If-Match: no 409
+    assert client.patch(f"{url}/mark-in-progress", headers=task["headers"]).status_code == 200
+    response = client.patch(f"{url}/mark-done", headers=task["headers"])
+    assert response.status_code == 200
+    assert response.json()["status"] == "Done"
+    assert response.json()["version"] == task["version"] + 2
+    assert client.put(url, json={"title": "Last"}, headers={**task["headers"], "If-Match": "*"}).status_code == 200
+
+def test_project_if_match(client, task):
+    project, headers = task["project"], task["headers"]
+    url = f"/api/projects/{project['id']}"
+    stale = {**headers, "If-Match": f'"{project["version"]}"'}
+    assert client.put(url, json={"title": "First"}, headers=stale).status_code == 200
+    response = client.put(url, json={"title": "Second"}, headers=stale)
+    assert response.status_code == 409
+    assert response.headers["ETag"] == f'"{project["version"] + 1}"'
+    assert client.put(url, json={"title": "Third"}, headers=headers).status_code == 200
+    assert client.get(url, headers=headers).json()["title"] == "Third"
@@ -0,0 +1,30 @@
+"""/api/metrics is for scrapers holding METRICS_TOKEN and for admins, nobody else."""
+import time
+
+import pytest
+
+from app.core import security, tokens
+from tests.conftest import signup
+
+@pytest.fixture
+def scrape_token(monkeypatch):
+    monkeypatch.setattr(security, "METRICS_TOKEN", "scrape-secret")
+    return {"Authorization": "Bearer scrape-secret"}
+
+def test_metrics_need_credentials(client, scrape_token):
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    _, user = signup(client, f"metrics-user-{time.monotonic_ns()}")
+    assert client.get("/api/metrics", headers=user).status_code == 403
+
+def test_metrics_token_reads_metrics(client, scrape_token):
+    response = client.get("/api/metrics", headers=scrape_token)
+    assert response.status_code == 200
+    assert "http_requests_rejected" in response.text
+
+def test_admin_reads_metrics_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(security, "METRICS_TOKEN", "")
+    name = f"metrics-admin-{time.monotonic_ns()}"
+    monkeypatch.setattr(tokens, "ADMIN_EMAILS", {f"{name}@example.com"})
+    _, admin = signup(client, name)
+    assert client.get("/api/metrics", headers=admin).status_code == 200
@@ -0,0 +1,85 @@
+"""Routes stay within their SQL statement budgets as the data behind them grows.
+
+Each case runs its request against a project with several tasks, comments and
+members, as its owner and as a member, and checks ``X-Query-Count``. A lazy
+load or per-row query pushes the count past the budget, and strict budgets
+fail the request outright. When a route needs another statement, raise its
+``query_budget`` and the number here together.
+"""
+import pytest
+
+from tests.conftest import signup
+
+TASKS = 6
+COMMENTS = 4
+
+@pytest.fixture(scope="module")
+def board(client):
+    owner_id, owner = signup(client, "budget-owner")
+    member_id, member = signup(client, "budget-member")
+    outsider_id, _ = signup(client, "budget-outsider")
+    project_id = client.post("/api/projects/", json={"title": "Budgets", "description": "x"}, headers=owner).json()["id"]
+    assert client.post(f"/api/projects/{project_id}/add-member/{member_id}", headers=owner).status_code == 200
+    task_ids = [
+        client.post(f"/api/tasks/project/{project_id}", json={"title": f"Task {i}"}, headers=owner).json()["id"]
+        for i in range(TASKS)
+    ]
+    for i in range(COMMENTS):
+        client.post(f"/api/comments/task/{task_ids[0]}", json={"content": f"Comment {i}"}, headers=member)
+    return {
+        "project_id": project_id, "task_ids": task_ids, "owner": owner, "member": member, "outsider_id": outsider_id,
+    }
+
+def assert_within(response, budget: int):
+    assert response.status_code < 400, response.text
+    assert int(response.headers["X-Query-Count"]) <= budget
+
+READS = [
+    ("/api/projects/", 2),
+    ("/api/projects/{project_id}", 2),
+    ("/api/projects/summaries", 2),
+    ("/api/projects/{project_id}/summary", 3),
+    ("/api/projects/{project_id}/activity", 3),
+    ("/api/tasks/project/{project_id}", 3),
+    ("/api/tasks/project/{project_id}?status=To-do&limit=2", 3),
+    ("/api/comments/task/{task_id}", 3),
+    ("/api/search?q=task", 1),
+]
+
+@pytest.mark.parametrize("caller", ["owner", "member"])
+@pytest.mark.parametrize("path, budget", READS)
+def test_reads(client, board, caller, path, budget):
+    url = path.format(project_id=board["project_id"], task_id=board["task_ids"][0])
+    assert_within(client.get(url, headers=board[caller]), budget)
+
+@pytest.mark.parametrize("caller", ["owner", "member"])
+def test_task_writes(client, board, caller):
+    headers = board[caller]
+    response = client.post(f"/api/tasks/project/{board['project_id']}", json={"title": "Budgeted"}, headers=headers)
+    assert_within(response, 7)
+    task_id = response.json()["id"]
+    assert_within(client.put(f"/api/tasks/{task_id}", json={"title": "Renamed", "status": "Done"}, headers=headers), 6)
+    assert_within(client.patch(f"/api/tasks/{task_id}/mark-in-progress", headers=headers), 6)
+    assert_within(client.post(f"/api/comments/task/{task_id}", json={"content": "Noted"}, headers=headers), 7)
+    assert_within(client.delete(f"/api/tasks/{task_id}", headers=headers), 7)
+
+def test_delete_task_with_comments(client, board):
+    # Comments go in one set-based delete, however many there are
+    task_id = board["task_ids"][0]
+    assert_within(client.delete(f"/api/tasks/{task_id}", headers=board["owner"]), 7)
+
+def test_project_owner_routes(client, board):
+    owner, project_id = board["owner"], board["project_id"]
+    assert_within(client.post("/api/projects/", json={"title": "Another"}, headers=owner), 2)
+    assert_within(client.put(f"/api/projects/{project_id}", json={"title": "Renamed"}, headers=owner), 2)
+    assert_within(client.post(f"/api/projects/{project_id}/add-member/{board['outsider_id']}", headers=owner), 5)
+
+def test_ownership_checks_fail_within_budget(client, board):
+    # Rejections take the same few statements as successes, not a load of the project's rows
+    member, project_id = board["member"], board["project_id"]
+    response = client.put(f"/api/projects/{project_id}", json={"title": "Not mine"}, headers=member)
+    assert response.status_code == 403
+    assert int(response.headers["X-Query-Count"]) <= 2
+    response = client.post(f"/api/projects/{project_id}/add-member/{board['outsider_id']}", headers=member)
+    assert response.status_code == 403
+    assert int(response.headers["X-Query-Count"]) <= 5
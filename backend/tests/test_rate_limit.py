@@ -0,0 +1,70 @@
+"""Admission control, which the rest of the suite runs without (RATE_LIMIT=off):
+an empty token bucket is a 429 and a full queue a 503, both with Retry-After."""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core import rate_limit
+from tests.conftest import signup
+
+@pytest.fixture
+def tiny_bucket(monkeypatch):
+    """Two requests of burst, refilling one every 100 seconds."""
+    monkeypatch.setattr(rate_limit, "limiter", rate_limit.MemoryRateLimiter(100))
+    monkeypatch.setattr(rate_limit, "USER_BUCKET", rate_limit.Bucket("user", 0.01, 2))
+
+def test_empty_bucket_is_429_with_retry_after(client, tiny_bucket):
+    _, headers = signup(client, f"limited-{time.monotonic_ns()}")
+    assert [client.get("/api/projects/", headers=headers).status_code for _ in range(2)] == [200, 200]
+    response = client.get("/api/projects/", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Buckets are per caller, and health checks are never limited
+    _, other = signup(client, f"unlimited-{time.monotonic_ns()}")
+    assert client.get("/api/projects/", headers=other).status_code == 200
+    assert client.get("/api/health").status_code == 200
+
+def slow_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(rate_limit.RateLimitMiddleware, max_concurrent=1)
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    return app
+
+async def one_in_flight(release_after: float) -> list:
+    """Two concurrent requests against a single slot; the first is held for ``release_after`` seconds."""
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=slow_app(release))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(release_after)
+        release.set()
+        return [await first, await second]
+
+@pytest.mark.parametrize("queued, timeout", [(0, 5), (1, 0.05)])
+def test_busy_worker_sheds_with_503(monkeypatch, queued, timeout):
+    # No queue at all, then a queue whose wait runs out before the slot frees up
+    monkeypatch.setattr(rate_limit, "limiter", None)
+    monkeypatch.setattr(rate_limit, "MAX_QUEUED_REQUESTS", queued)
+    monkeypatch.setattr(rate_limit, "REQUEST_QUEUE_TIMEOUT_SECONDS", timeout)
+    first, second = asyncio.run(one_in_flight(release_after=0.3))
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert int(second.headers["Retry-After"]) >= 1
+
+def test_queued_request_runs_when_a_slot_frees(monkeypatch):
+    monkeypatch.setattr(rate_limit, "limiter", None)
+    monkeypatch.setattr(rate_limit, "MAX_QUEUED_REQUESTS", 1)
+    monkeypatch.setattr(rate_limit, "REQUEST_QUEUE_TIMEOUT_SECONDS", 5)
+    first, second = asyncio.run(one_in_flight(release_after=0.1))
+    assert (first.status_code, second.status_code) == (200, 200)
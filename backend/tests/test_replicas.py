@@ -0,0 +1,87 @@
+"""Read-only routes go to a healthy replica in turn, and to the primary after the caller writes.
+
+Two SQLite copies of the test database stand in for replicas, made with
+``scripts.sync_replicas``. Each copy then gets its own project title, so every
+response shows which database served it.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import exc
+
+from scripts.sync_replicas import sqlite_path, sync
+from tests.conftest import signup
+
+@pytest.fixture
+def board(client):
+    owner_id, owner = signup(client, f"replica-owner-{time.monotonic_ns()}")
+    member_id, member = signup(client, f"replica-member-{time.monotonic_ns()}")
+    project_id = client.post("/api/projects/", json={"title": "primary"}, headers=owner).json()["id"]
+    client.post(f"/api/projects/{project_id}/add-member/{member_id}", headers=owner)
+    return {"project_id": project_id, "owner": owner, "member": member}
+
+@pytest.fixture
+def replicas(board, monkeypatch, tmp_path):
+    """Two fresh replicas of the primary, titled "replica0" and "replica1", and a clean replica state."""
+    from app import database
+    from app.core import replicas
+
+    paths = [str(tmp_path / f"replica{index}.db") for index in range(2)]
+    sync(sqlite_path(database.DATABASE_URL), paths)
+    for index, path in enumerate(paths):
+        with sqlite3.connect(path) as connection:
+            connection.execute("UPDATE projects SET title = ? WHERE id = ?", (f"replica{index}", board["project_id"]))
+    urls = [f"sqlite:///{path}" for path in paths]
+    engines = [database.create_replica_engine(url) for url in urls]
+    monkeypatch.setattr(database, "replica_engines", engines)
+    monkeypatch.setattr(replicas, "replica_set", replicas.ReplicaSet(urls))
+    monkeypatch.setattr(replicas, "sticky_store", replicas.MemoryStickyStore(100))
+    yield paths
+    for engine in engines:
+        if database.DATABASE_ASYNC:
+            asyncio.run(engine.dispose())
+        else:
+            engine.dispose()
+
+def served_by(client, board, caller="owner") -> str:
+    response = client.get(f"/api/projects/{board['project_id']}", headers=board[caller])
+    assert response.status_code == 200, response.text
+    return response.json()["title"]
+
+def test_round_robin(client, board, replicas):
+    assert [served_by(client, board) for _ in range(4)] == ["replica0", "replica1", "replica0", "replica1"]
+
+def test_primary_when_no_replica_is_healthy(client, board, replicas):
+    from app.core.replicas import replica_set
+    for replica in replica_set.replicas:
+        replica.healthy = False
+    assert served_by(client, board) == "primary"
+
+def test_failing_replica_leaves_rotation(client, board, replicas):
+    from app.core.replicas import replica_set
+    with sqlite3.connect(replicas[0]) as connection:
+        connection.execute("ALTER TABLE projects RENAME TO projects_gone")
+    with pytest.raises(exc.OperationalError):
+        served_by(client, board)
+    assert not replica_set.replicas[0].healthy
+    assert [served_by(client, board) for _ in range(3)] == ["replica1"] * 3
+
+def test_reads_follow_writes_to_the_primary(client, board, replicas, monkeypatch):
+    from app.core import replicas as replica_module
+    monkeypatch.setattr(replica_module, "REPLICA_STICKY_SECONDS", 0.5)
+    project_id = board["project_id"]
+    response = client.put(f"/api/projects/{project_id}", json={"title": "renamed"}, headers=board["owner"])
+    assert response.status_code == 200
+    # The writer sees the write; other users keep reading replicas
+    assert served_by(client, board) == "renamed"
+    assert served_by(client, board, "member") == "replica0"
+    time.sleep(0.6)
+    assert served_by(client, board) == "replica1"
+
+def test_streamed_lists_read_from_the_replica(client, board, replicas):
+    response = client.get("/api/projects/?stream=true", headers=board["owner"])
+    titles = {row["id"]: row["title"] for row in map(json.loads, response.text.splitlines())}
+    assert titles[board["project_id"]] == "replica0"
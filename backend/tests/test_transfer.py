@@ -0,0 +1,91 @@
+"""Project export and import: what one exports the other reads back, in both
+formats, and a bad row rejects the whole import without leaving a project behind."""
+import csv
+import io
+import json
+import time
+
+import pytest
+
+from app.core import transfer
+from tests.conftest import signup
+
+TASKS = [
+    {"title": "Plan", "description": "Scope, dates", "status": "Done", "priority": "High"},
+    {"title": "Build", "description": None, "status": "In-progress", "priority": "Medium"},
+    {"title": "Ship, then \"celebrate\"", "description": "multi\nline", "status": "To-do", "priority": "Low"},
+]
+
+@pytest.fixture
+def owner(client):
+    user_id, headers = signup(client, f"transfer-{time.monotonic_ns()}")
+    return {"id": user_id, "headers": headers}
+
+def parse(body: str, format: str) -> list:
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(body)))
+    return [json.loads(line) for line in body.splitlines() if line]
+
+def board_contents(client, project_id: int, headers: dict) -> tuple:
+    """Tasks and comments as the API lists them, without ids or timestamps."""
+    tasks = client.get(f"/api/tasks/project/{project_id}?limit=100", headers=headers).json()["items"]
+    comments = []
+    for task in tasks:
+        listed = client.get(f"/api/comments/task/{task['id']}", headers=headers).json()["items"]
+        comments += [(task["title"], comment["content"], comment["user_id"]) for comment in listed]
+    fields = ("title", "description", "status", "priority", "assignee_id")
+    return sorted(tuple(task[field] or "" for field in fields) for task in tasks), sorted(comments)
+
+def import_file(client, headers: dict, body, filename: str, **params):
+    return client.post(
+        "/api/projects/import", params=params, files={"file": (filename, body, "application/octet-stream")},
+        headers=headers,
+    )
+
+def project_ids(client, headers: dict) -> set:
+    return {project["id"] for project in client.get("/api/projects/?limit=100", headers=headers).json()["items"]}
+
+@pytest.mark.parametrize("format", ["jsonl", "csv"])
+def test_export_then_import_round_trips(client, owner, format):
+    headers = owner["headers"]
+    project_id = client.post("/api/projects/", json={"title": "Original", "description": "Export me"}, headers=headers).json()["id"]
+    for task in TASKS:
+        task_id = client.post(
+            f"/api/tasks/project/{project_id}", json={**task, "assignee_id": owner["id"]}, headers=headers
+        ).json()["id"]
+        client.post(f"/api/comments/task/{task_id}", json={"content": f"On {task['title']}"}, headers=headers)
+
+    exported = client.get(f"/api/projects/{project_id}/export?format={format}", headers=headers)
+    assert exported.status_code == 200
+    records = parse(exported.text, format)
+    assert [record["record"] for record in records] == ["project"] + ["task"] * 3 + ["comment"] * 3
+
+    response = import_file(client, headers, exported.content, f"project.{format}")
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["tasks"], result["comments"]) == (3, 3)
+    assert (result["project"]["title"], result["project"]["description"]) == ("Original", "Export me")
+    assert board_contents(client, result["project"]["id"], headers) == board_contents(client, project_id, headers)
+
+    summary = client.get(f"/api/projects/{result['project']['id']}/summary", headers=headers).json()
+    assert summary["total"] == 3
+    assert {status: count for status, count in summary["by_status"].items() if count} == {
+        "Done": 1, "In-progress": 1, "To-do": 1,
+    }
+
+@pytest.mark.parametrize("batch_size", [transfer.IMPORT_BATCH_SIZE, 2])
+def test_bad_row_rejects_the_import(client, owner, monkeypatch, batch_size):
+    # With a batch size of 2 the valid rows before the bad one are committed first
+    monkeypatch.setattr(transfer, "IMPORT_BATCH_SIZE", batch_size)
+    headers = owner["headers"]
+    before = project_ids(client, headers)
+    lines = [{"record": "project", "title": "Half"}]
+    lines += [{"record": "task", "id": i, "title": f"Task {i}", "status": "To-do"} for i in range(4)]
+    lines += [{"record": "task", "id": 4, "title": "Bad", "status": "Someday"}]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+
+    response = import_file(client, headers, body, "half.jsonl")
+    assert response.status_code == 422
+    assert [error["row"] for error in response.json()["detail"]] == [6]
+    assert project_ids(client, headers) == before
+    assert client.get("/api/search?q=Task", headers=headers).json()["items"] == []
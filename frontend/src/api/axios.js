@@ -13,4 +13,27 @@ API.interceptors.request.use((config) => {
   return config;
 });
 
+// List endpoints are cursor-paginated: follow next_cursor until exhausted
+export const fetchAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const res = await API.get(url, { params: { ...params, limit: 200, ...(cursor && { cursor }) } });
+    items.push(...res.data.items);
+    cursor = res.data.next_cursor;
+  } while (cursor);
+  return items;
+};
+
+// Server-Sent Events for one project's changes; EventSource cannot send headers,
+// so the token goes in the query string. Returns a function that closes the stream.
+export const subscribeToProject = (projectId, onEvent) => {
+  const token = localStorage.getItem("token");
+  const source = new EventSource(
+    `${API_BASE_URL}/api/projects/${projectId}/events?access_token=${encodeURIComponent(token || "")}`
+  );
+  source.onmessage = (message) => onEvent(JSON.parse(message.data));
+  return () => source.close();
+};
+
 export default API;
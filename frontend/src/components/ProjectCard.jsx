@@ -1,4 +1,4 @@
-export default function ProjectCard({ project, onClick }) {
+export default function ProjectCard({ project, summary, onClick }) {
   return (
     <div
       onClick={() => onClick(project.id)}
@@ -6,6 +6,11 @@ export default function ProjectCard({ project, onClick }) {
     >
       <h3 className="text-xl font-bold mb-2 text-white">{project.title}</h3>
       <p className="text-gray-300 text-sm opacity-90">{project.description || "No description"}</p>
+      {summary && (
+        <p className="text-gray-400 text-xs mt-2">
+          {summary.total} tasks · {summary.by_status["Done"] || 0} done
+        </p>
+      )}
     </div>
   );
 }
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import API from "../api/axios";
+import API, { fetchAllPages, subscribeToProject } from "../api/axios";
 import ProjectCard from "../components/ProjectCard";
 import TaskCard from "../components/TaskCard";
 import DraggableTaskCard from "../components/DraggableTaskCard";
@@ -28,6 +28,7 @@ export default function DashboardWrapper() {
 
 function Dashboard() {
   const [projects, setProjects] = useState([]);
+  const [summaries, setSummaries] = useState({}); // project_id -> task counts
   const [selectedProject, setSelectedProject] = useState(null);
   const [tasks, setTasks] = useState([]);
 
@@ -66,8 +67,12 @@ function Dashboard() {
   // -------------------------
   const fetchProjects = async () => {
     try {
-      const res = await API.get("/projects/"); // matches project router that defines "/"
-      setProjects(res.data);
+      const [items, summaryRes] = await Promise.all([
+        fetchAllPages("/projects/"), // matches project router that defines "/"
+        API.get("/projects/summaries"),
+      ]);
+      setProjects(items);
+      setSummaries(Object.fromEntries(summaryRes.data.map((s) => [s.project_id, s])));
     } catch (err) {
       console.error("❌ Error fetching projects:", err.response?.data || err);
       alert("Error fetching projects");
@@ -140,8 +145,8 @@ function Dashboard() {
   const fetchTasks = async (projectId) => {
     if (!projectId && projectId !== 0) return;
     try {
-      const res = await API.get(`/tasks/project/${projectId}`); // NO trailing slash (matches task.py)
-      setTasks(res.data);
+      const items = await fetchAllPages(`/tasks/project/${projectId}`); // NO trailing slash (matches task.py)
+      setTasks(items);
     } catch (err) {
       console.error("❌ Error fetching tasks:", err.response?.data || err);
       alert("Error fetching tasks");
@@ -165,7 +170,8 @@ function Dashboard() {
         priority: newTaskPriority.toLowerCase(),
         assignee_id: null,
       });
-      setTasks((prev) => [...prev, res.data]);
+      // the board's event stream may already have added it
+      setTasks((prev) => [...prev.filter((t) => t.id !== res.data.id), res.data]);
       setNewTaskTitle("");
       setNewTaskDesc("");
       setNewTaskPriority("medium");
@@ -323,6 +329,27 @@ function Dashboard() {
     fetchProjects();
   }, []);
 
+  // Live updates for the open board instead of refetching after every change
+  useEffect(() => {
+    if (!selectedProject) return;
+    return subscribeToProject(selectedProject, (event) => {
+      if (event.type === "task.deleted") {
+        setTasks((prev) => prev.filter((t) => t.id !== event.id));
+      } else if (event.type.startsWith("task.") && event.data) {
+        setTasks((prev) =>
+          prev.some((t) => t.id === event.id)
+            ? prev.map((t) => (t.id === event.id ? event.data : t))
+            : [...prev, event.data]
+        );
+      } else if (event.type.startsWith("task") || event.type === "resync") {
+        // batch changes, or events too large to carry the task itself
+        fetchTasks(selectedProject);
+      } else if (event.type === "project.updated" && event.data) {
+        setProjects((prev) => prev.map((p) => (p.id === event.project_id ? event.data : p)));
+      }
+    });
+  }, [selectedProject]);
+
   // -------------------------
   // RENDER
   // -------------------------
@@ -396,7 +423,7 @@ function Dashboard() {
                 className={`relative group cursor-pointer transition-all transform hover:scale-102 ${selectedProject === project.id ? "bg-gradient-to-r from-cyan-600 to-blue-700 shadow-lg" : "bg-gray-800 bg-opacity-60 hover:bg-opacity-80"} rounded-xl p-4 border border-gray-600 backdrop-blur-sm`}
                 onClick={() => handleProjectClick(project.id)}
               >
-                <ProjectCard project={project} onClick={handleProjectClick} />
+                <ProjectCard project={project} summary={summaries[project.id]} onClick={handleProjectClick} />
                 <div className="absolute top-2 right-2 opacity-0 group-hover:opacity-100 transition-opacity flex gap-1">
                   <button onClick={(e) => { e.stopPropagation(); setEditProjectId(project.id); setEditProjectTitle(project.title); setEditProjectDescription(project.description); }} className="text-yellow-400 hover:text-yellow-300 p-1 rounded bg-gray-900 bg-opacity-70" title="Edit Project">✏️</button>
                   <button onClick={(e) => { e.stopPropagation(); handleDeleteProject(project.id); }} className="text-red-400 hover:text-red-300 p-1 rounded bg-gray-900 bg-opacity-70" title="Delete Project">🗑️</button>